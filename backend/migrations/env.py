@@ -0,0 +1,63 @@
+"""Alembic environment: runs migrations through the app's async engine."""
+
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+from src.database import engine, ASYNC_DATABASE_URL
+from src import models  # noqa: F401 - registers the tables on SQLModel.metadata
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = SQLModel.metadata
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Leave the SQLite FTS5 search tables (created by migration 0003) out of autogenerate."""
+    if type_ == "table":
+        return not (name or "").startswith("tasks_fts")
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL to stdout instead of running it."""
+    context.configure(
+        url=ASYNC_DATABASE_URL.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_async_migrations())
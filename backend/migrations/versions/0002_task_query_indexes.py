@@ -0,0 +1,61 @@
+"""Composite indexes matching the task, conversation and message queries
+
+Every task query filters on user_id (and sometimes completed) and orders by
+a column with id as the tiebreak, so the single-column indexes on user_id
+and title are replaced by composites that return rows already in order.
+B-tree indexes are scanned backwards for DESC, so one index serves both
+directions.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_tasks_user_created", "tasks", ["user_id", "created_at", "id"])
+    op.create_index(
+        "ix_tasks_user_completed_created", "tasks", ["user_id", "completed", "created_at", "id"]
+    )
+    op.create_index("ix_tasks_user_completed", "tasks", ["user_id", "completed", "id"])
+    op.create_index("ix_tasks_user_updated", "tasks", ["user_id", "updated_at", "id"])
+    op.create_index("ix_tasks_user_title", "tasks", ["user_id", "title", "id"])
+    op.drop_index("ix_tasks_user_id", table_name="tasks")
+    op.drop_index("ix_tasks_title", table_name="tasks")
+
+    op.create_index(
+        "ix_conversations_user_updated", "conversations", ["user_id", "updated_at"]
+    )
+    op.drop_index("ix_conversations_user_id", table_name="conversations")
+
+    op.create_index(
+        "ix_messages_conversation_created", "messages", ["conversation_id", "created_at", "id"]
+    )
+    op.drop_index("ix_messages_conversation_id", table_name="messages")
+
+
+def downgrade() -> None:
+    op.create_index("ix_messages_conversation_id", "messages", ["conversation_id"])
+    op.drop_index("ix_messages_conversation_created", table_name="messages")
+
+    op.create_index("ix_conversations_user_id", "conversations", ["user_id"])
+    op.drop_index("ix_conversations_user_updated", table_name="conversations")
+
+    op.create_index("ix_tasks_title", "tasks", ["title"])
+    op.create_index("ix_tasks_user_id", "tasks", ["user_id"])
+    op.drop_index("ix_tasks_user_title", table_name="tasks")
+    op.drop_index("ix_tasks_user_updated", table_name="tasks")
+    op.drop_index("ix_tasks_user_completed", table_name="tasks")
+    op.drop_index("ix_tasks_user_completed_created", table_name="tasks")
+    op.drop_index("ix_tasks_user_created", table_name="tasks")
@@ -0,0 +1,49 @@
+"""Full-text search index for tasks
+
+Postgres gets a GIN index over a weighted tsvector of title and description.
+SQLite (local development) gets an FTS5 table kept in sync by triggers.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.models import SQLITE_TASK_FTS_DDL, TASK_SEARCH_VECTOR
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.create_index(
+            "ix_tasks_search", "tasks", [sa.text(f"({TASK_SEARCH_VECTOR})")],
+            postgresql_using="gin"
+        )
+    elif dialect == "sqlite":
+        for statement in SQLITE_TASK_FTS_DDL:
+            op.execute(statement)
+        # Index the rows that already exist
+        op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.drop_index("ix_tasks_search", table_name="tasks")
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER tasks_fts_au")
+        op.execute("DROP TRIGGER tasks_fts_ad")
+        op.execute("DROP TRIGGER tasks_fts_ai")
+        op.execute("DROP TABLE tasks_fts")
@@ -0,0 +1,41 @@
+"""Revoked token table
+
+Holds the jti of access and refresh tokens revoked before they expire, so
+logout and refresh token rotation hold across workers. Workers poll it for
+rows newer than their last sync (revoked_at); expires_at lets old rows be
+purged.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.Integer(), nullable=False),
+        sa.Column("revoked_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("jti"),
+    )
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+    op.create_index("ix_revoked_tokens_revoked_at", "revoked_tokens", ["revoked_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_revoked_tokens_revoked_at", table_name="revoked_tokens")
+    op.drop_index("ix_revoked_tokens_expires_at", table_name="revoked_tokens")
+    op.drop_table("revoked_tokens")
@@ -0,0 +1,33 @@
+"""Running summary on conversations
+
+Conversation history sent to the agent is limited by a token budget; turns
+that fall out of the window are folded into conversations.summary, and
+summarized_through records the last message id it covers.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("conversations", sa.Column("summary", sa.String(), nullable=True))
+    op.add_column("conversations", sa.Column("summarized_through", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    # Batch mode so SQLite can drop the columns too
+    with op.batch_alter_table("conversations") as batch_op:
+        batch_op.drop_column("summarized_through")
+        batch_op.drop_column("summary")
@@ -0,0 +1,40 @@
+"""Deleted task tombstones for delta sync
+
+Task deletes also record the task id here, in the same transaction, so
+GET /api/tasks/changes can report deletions alongside changed rows (found
+through ix_tasks_user_updated). Indexed the same way: by user, then time.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "deleted_tasks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_deleted_tasks_user_deleted", "deleted_tasks", ["user_id", "deleted_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_deleted_tasks_user_deleted", table_name="deleted_tasks")
+    op.drop_table("deleted_tasks")
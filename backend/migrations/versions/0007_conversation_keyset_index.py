@@ -0,0 +1,35 @@
+"""Add id to the conversation listing index
+
+Conversations are now paged newest first with an (updated_at, id) keyset
+cursor; with id in the index, each page is a single index range scan
+already in order, as for tasks and messages.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_conversations_user_updated", table_name="conversations")
+    op.create_index(
+        "ix_conversations_user_updated", "conversations", ["user_id", "updated_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_conversations_user_updated", table_name="conversations")
+    op.create_index(
+        "ix_conversations_user_updated", "conversations", ["user_id", "updated_at"]
+    )
@@ -0,0 +1,62 @@
+"""Store the create_all era timestamps with time zone
+
+Databases created by the old startup create_all (then stamped 0001) have
+`timestamp without time zone` columns, while 0001 declares them with time
+zone. Their values were written in UTC, so each such column is converted
+reading its values as UTC. Columns that already have a time zone (databases
+built by running 0001) are left alone. SQLite has no timestamp types and
+needs nothing.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The timestamp columns of the tables create_all used to make
+COLUMNS = [
+    ("users", "created_at"),
+    ("tasks", "created_at"),
+    ("tasks", "updated_at"),
+    ("conversations", "created_at"),
+    ("conversations", "updated_at"),
+    ("messages", "created_at"),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    for table, column in COLUMNS:
+        data_type = bind.execute(
+            sa.text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_schema = current_schema() "
+                "AND table_name = :table AND column_name = :column"
+            ),
+            {"table": table, "column": column},
+        ).scalar()
+        if data_type == "timestamp without time zone":
+            op.alter_column(
+                table, column,
+                type_=sa.DateTime(timezone=True),
+                postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+            )
+
+
+def downgrade() -> None:
+    # 0001 already declares these columns with time zone
+    pass
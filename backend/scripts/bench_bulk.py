@@ -0,0 +1,103 @@
+"""
+Benchmark: per-item task requests against one POST /api/tasks/bulk.
+
+Runs the same workload both ways - create N tasks, complete half of them,
+then delete the completed ones ("clear completed") - first as sequential
+single-task requests, then as three bulk requests, and reports wall time.
+
+Usage, against a running server (from the backend directory):
+    uvicorn src.main:app --port 8000
+    python scripts/bench_bulk.py --base-url http://127.0.0.1:8000 [--tasks 200]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+
+async def per_item(client: httpx.AsyncClient, headers: Dict[str, str], count: int) -> List[float]:
+    timings = []
+
+    start = time.perf_counter()
+    ids = []
+    for i in range(count):
+        response = await client.post("/api/tasks", json={"title": f"task {i}"}, headers=headers)
+        response.raise_for_status()
+        ids.append(response.json()["id"])
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for task_id in ids[::2]:
+        response = await client.patch(f"/api/tasks/{task_id}", json={"completed": True}, headers=headers)
+        response.raise_for_status()
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for task_id in ids[::2]:
+        response = await client.delete(f"/api/tasks/{task_id}", headers=headers)
+        response.raise_for_status()
+    timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+async def bulk(client: httpx.AsyncClient, headers: Dict[str, str], count: int) -> List[float]:
+    async def run(operations: List[dict]) -> List[dict]:
+        response = await client.post("/api/tasks/bulk", json={"operations": operations}, headers=headers)
+        response.raise_for_status()
+        return response.json()["results"]
+
+    timings = []
+
+    start = time.perf_counter()
+    results = await run([{"op": "create", "title": f"task {i}"} for i in range(count)])
+    ids = [result["id"] for result in results]
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await run([{"op": "complete", "id": task_id} for task_id in ids[::2]])
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await run([{"op": "delete", "id": task_id} for task_id in ids[::2]])
+    timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+async def login(client: httpx.AsyncClient) -> Dict[str, str]:
+    email = f"bulk-{uuid.uuid4().hex[:12]}@example.com"
+    password = "bench-password"
+    response = await client.post(
+        "/api/auth/signup", json={"email": email, "username": "bulk bench", "password": password}
+    )
+    response.raise_for_status()
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--tasks", type=int, default=200, help="tasks to create (max 500 per bulk request)")
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120) as client:
+        # A fresh user for each run so both start from an empty task list
+        single = await per_item(client, await login(client), args.tasks)
+        batched = await bulk(client, await login(client), args.tasks)
+
+    print(f"{args.tasks} creates, {len(range(0, args.tasks, 2))} completes, same number of deletes")
+    for label, a, b in zip(("create", "complete", "delete"), single, batched):
+        print(f"  {label:<9} per-item {a * 1000:8.1f} ms   bulk {b * 1000:7.1f} ms   speedup {a / b:5.1f}x")
+    print(f"  {'total':<9} per-item {sum(single) * 1000:8.1f} ms   bulk {sum(batched) * 1000:7.1f} ms   "
+          f"speedup {sum(single) / sum(batched):5.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Measure cold-start import cost of the API with `python -X importtime`.
+
+Runs `import src.main` in fresh interpreters and reports its total import
+time, the slowest modules it pulls in, and whether the LLM client library
+(openai) was loaded, which should only happen on the first /api/chat call.
+
+Usage (from the backend directory):
+    python scripts/bench_startup.py [--runs 5] [--top 10] [--module src.main]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str) -> List[Tuple[str, int, int]]:
+    """Import `module` in a fresh interpreter; return (name, self_us, cumulative_us) rows."""
+    env = dict(os.environ)
+    # Importing the app only needs a syntactically valid URL; nothing connects at import
+    env.setdefault("DATABASE_URL", "sqlite:///./bench-startup.db")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--module", default="src.main")
+    args = parser.parse_args()
+
+    totals: List[int] = []
+    imports: Dict[str, List[int]] = {}
+    loaded_openai = False
+
+    for _ in range(args.runs):
+        rows = measure(args.module)
+        for name, _, cumulative in rows:
+            # Names are indented one space, plus two per nesting level
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            if depth == 0 and name.strip() == args.module:
+                totals.append(cumulative)
+            elif depth == 1:
+                imports.setdefault(name.strip(), []).append(cumulative)
+        loaded_openai = loaded_openai or any(name.strip() == "openai" for name, _, _ in rows)
+
+    print(f"import {args.module}: {args.runs} runs")
+    print(f"  total   median {statistics.median(totals) / 1000:8.1f} ms   "
+          f"min {min(totals) / 1000:8.1f} ms   max {max(totals) / 1000:8.1f} ms")
+    print(f"  openai loaded at import: {'yes' if loaded_openai else 'no'}")
+    print("  slowest imports (median cumulative):")
+    slowest = sorted(imports.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, samples in slowest[:args.top]:
+        print(f"    {statistics.median(samples) / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Load test: task API latency while the server is handling a burst of logins.
+
+Measures GET /api/tasks latency on an idle server, then again while many
+concurrent logins (each a ~250ms bcrypt verification) are in flight. With
+hashing off the event loop the two should be close.
+
+Usage, against a running server (from the backend directory):
+    uvicorn src.main:app --port 8000
+    python scripts/load_login_storm.py --base-url http://127.0.0.1:8000 [--logins 40]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import List
+
+import httpx
+
+
+async def probe(client: httpx.AsyncClient, headers: dict, stop: asyncio.Event, interval: float) -> List[float]:
+    """Time GET /api/tasks repeatedly until `stop` is set."""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/tasks", headers=headers)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def storm(client: httpx.AsyncClient, email: str, password: str, logins: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login() -> None:
+        async with semaphore:
+            response = await client.post("/api/auth/login", json={"email": email, "password": password})
+            response.raise_for_status()
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+
+
+def summarize(label: str, latencies: List[float]) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"  {label:<14} n={len(latencies):<4} p50 {statistics.median(latencies):7.1f} ms   "
+          f"p95 {p95:7.1f} ms   max {latencies[-1]:7.1f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.02, help="pause between probes (s)")
+    args = parser.parse_args()
+
+    email = f"storm-{uuid.uuid4().hex[:12]}@example.com"
+    password = "load-test-password"
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120) as client:
+        response = await client.post(
+            "/api/auth/signup", json={"email": email, "username": "load test", "password": password}
+        )
+        response.raise_for_status()
+        response = await client.post("/api/auth/login", json={"email": email, "password": password})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        await client.post("/api/tasks", json={"title": "load test task"}, headers=headers)
+
+        # Idle baseline
+        stop = asyncio.Event()
+        baseline_task = asyncio.create_task(probe(client, headers, stop, args.interval))
+        await asyncio.sleep(2)
+        stop.set()
+        baseline = await baseline_task
+
+        # Same probe while the login storm runs
+        stop = asyncio.Event()
+        storm_probe = asyncio.create_task(probe(client, headers, stop, args.interval))
+        start = time.perf_counter()
+        await storm(client, email, password, args.logins, args.concurrency)
+        storm_seconds = time.perf_counter() - start
+        stop.set()
+        during = await storm_probe
+
+    print(f"GET /api/tasks latency, {args.logins} logins at concurrency {args.concurrency} "
+          f"(storm took {storm_seconds:.1f}s)")
+    summarize("idle", baseline)
+    summarize("login storm", during)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1 +1 @@
-# src package
+# src package
@@ -1,121 +1,373 @@
-"""OpenAI Agent client for todo assistant."""
-
-import os
-import json
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
-from dotenv import load_dotenv
-
-from .prompts import SYSTEM_PROMPT
-from ..mcp.server import get_mcp_tools, get_tool
-
-# Load environment variables
-load_dotenv()
-
-# Initialize OpenAI client with Google AI (Gemini) via OpenAI compatibility
-# Using Google's Gemini model through the OpenAI-compatible API
-client = OpenAI(
-    api_key=os.getenv("GOOGLE_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-)
-
-
-def run_agent(
-    user_id: str,
-    message: str,
-    conversation_history: Optional[List[Dict[str, str]]] = None,
-    model: str = "gemini-2.5-flash"
-) -> str:
-    """
-    Run the OpenAI agent with user message and conversation history.
-    
-    Args:
-        user_id: User identifier for tool authentication
-        message: User's message
-        conversation_history: List of previous messages [{role, content}]
-        model: Model to use (default: gemini-2.5-flash via Google AI)
-    
-    Returns:
-        Assistant's response string
-    """
-    # Prepare messages
-    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-    
-    # Add conversation history
-    if conversation_history:
-        messages.extend(conversation_history)
-    
-    # Add current user message
-    messages.append({"role": "user", "content": message})
-    
-    # Get tools
-    tools = get_mcp_tools()
-    
-    # Run agent with tool calling
-    max_iterations = 10
-    iteration = 0
-    
-    while iteration < max_iterations:
-        iteration += 1
-        
-        try:
-            # Call OpenAI API
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                tools=tools,
-                tool_choice="auto"
-            )
-            
-            assistant_message = response.choices[0].message
-            
-            # Check if agent wants to call tools
-            if assistant_message.tool_calls:
-                # Add assistant message to history
-                messages.append({
-                    "role": "assistant",
-                    "content": assistant_message.content or "",
-                    "tool_calls": [
-                        {
-                            "id": tc.id,
-                            "type": tc.type,
-                            "function": {
-                                "name": tc.function.name,
-                                "arguments": tc.function.arguments
-                            }
-                        }
-                        for tc in assistant_message.tool_calls
-                    ]
-                })
-                
-                # Execute each tool call
-                for tool_call in assistant_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-                    
-                    # Inject user_id into function arguments (security)
-                    function_args["user_id"] = user_id
-                    
-                    # Get and execute the tool
-                    tool_function = get_tool(function_name)
-                    result = tool_function(**function_args)
-                    
-                    # Add tool response to messages
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": function_name,
-                        "content": json.dumps(result)
-                    })
-            else:
-                # No more tool calls, return final response
-                return assistant_message.content or "I'm not sure how to help with that."
-        
-        except Exception as e:
-            # Log error and return friendly message
-            print(f"Agent error: {str(e)}")
-            return f"I apologize, but I encountered an error: {str(e)}"
-    
-    # Max iterations reached
-    return "I apologize, but I'm having trouble completing that request. Could you try rephrasing?"
-
+"""OpenAI Agent client for todo assistant."""
+
+import json
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, AsyncIterator, Set, Tuple
+from openai import AsyncOpenAI
+
+from .prompts import SYSTEM_PROMPT, SUMMARY_PROMPT
+from ..config import settings
+from ..mcp.server import get_mcp_tools, call_tool
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[AsyncOpenAI] = None
+
+
+def get_client() -> AsyncOpenAI:
+    """
+    Return the shared LLM client, creating it on first use.
+    
+    Uses Google's Gemini model through its OpenAI-compatible API by default;
+    LLM_BASE_URL can point at any other OpenAI-compatible server (e.g. a local stub).
+    The async client lets other requests proceed while we wait on the model.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=settings.google_api_key,
+            base_url=settings.llm_base_url
+        )
+    return _client
+
+
+MAX_ITERATIONS = 10
+FALLBACK_RESPONSE = "I'm not sure how to help with that."
+MAX_ITERATIONS_RESPONSE = "I apologize, but I'm having trouble completing that request. Could you try rephrasing?"
+
+
+def _build_messages(
+    message: str,
+    conversation_history: Optional[List[Dict[str, str]]] = None
+) -> List[Dict[str, Any]]:
+    """Build the initial message list: system prompt, history, then the new user message."""
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    
+    # Add conversation history
+    if conversation_history:
+        messages.extend(conversation_history)
+    
+    # Add current user message
+    messages.append({"role": "user", "content": message})
+    
+    return messages
+
+
+async def _execute_tool_call(user_id: str, function_name: str, arguments: str) -> Dict[str, Any]:
+    """Execute a single tool call requested by the model."""
+    # Arguments are validated against the tool's schema; user_id is injected (security)
+    return await call_tool(function_name, arguments, user_id)
+
+
+def _task_ids(arguments: str) -> Set[int]:
+    """Task ids a call's arguments refer to (task_id / task_ids); empty if they don't parse."""
+    try:
+        args = json.loads(arguments or "{}")
+    except ValueError:
+        return set()
+    if not isinstance(args, dict):
+        return set()
+    values = args.get("task_ids")
+    values = list(values) if isinstance(values, list) else []
+    values.append(args.get("task_id"))
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            pass
+    return ids
+
+
+def _conflict_groups(calls: List[Tuple[str, str]]) -> List[List[int]]:
+    """
+    Partition `calls` (by index) so that calls touching a common task share a group.
+    
+    Each group keeps the model's order; different groups touch disjoint tasks.
+    """
+    groups: List[List[int]] = []
+    owner: Dict[int, int] = {}  # task id -> index into groups
+    for index, (_, arguments) in enumerate(calls):
+        ids = _task_ids(arguments)
+        touched = sorted({owner[task_id] for task_id in ids if task_id in owner})
+        if not touched:
+            group = len(groups)
+            groups.append([])
+        else:
+            # The call links these groups; merge them into the first
+            group = touched[0]
+            for other in touched[1:]:
+                groups[group].extend(groups[other])
+                groups[other] = []
+            for task_id, owning in owner.items():
+                if owning in touched:
+                    owner[task_id] = group
+            groups[group].sort()
+        groups[group].append(index)
+        for task_id in ids:
+            owner[task_id] = group
+    return [group for group in groups if group]
+
+
+async def _execute_tool_calls(user_id: str, calls: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Execute the tool calls of one model turn, concurrently where they don't conflict.
+    
+    Calls naming the same task (task_id / task_ids) run one after another
+    in the model's order, so e.g. an update followed by a delete of a task
+    can't swap. Each group runs concurrently with the others; every tool
+    uses its own database session, so they overlap their round trips.
+    Results are returned in the order of `calls`.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+    
+    async def run_group(group: List[int]) -> None:
+        for index in group:
+            function_name, arguments = calls[index]
+            results[index] = await _execute_tool_call(user_id, function_name, arguments)
+    
+    await asyncio.gather(*(run_group(group) for group in _conflict_groups(calls)))
+    return results
+
+
+async def run_agent(
+    user_id: str,
+    message: str,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    model: str = "gemini-2.5-flash"
+) -> str:
+    """
+    Run the OpenAI agent with user message and conversation history.
+    
+    Args:
+        user_id: User identifier for tool authentication
+        message: User's message
+        conversation_history: List of previous messages [{role, content}]
+        model: Model to use (default: gemini-2.5-flash via Google AI)
+    
+    Returns:
+        Assistant's response string
+    """
+    # Prepare messages
+    messages = _build_messages(message, conversation_history)
+    
+    # Get tools
+    tools = get_mcp_tools()
+    
+    # Run agent with tool calling
+    iteration = 0
+    
+    while iteration < MAX_ITERATIONS:
+        iteration += 1
+        
+        try:
+            # Call OpenAI API
+            response = await get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                tools=tools,
+                tool_choice="auto"
+            )
+            
+            assistant_message = response.choices[0].message
+            
+            # Check if agent wants to call tools
+            if assistant_message.tool_calls:
+                # Add assistant message to history
+                messages.append({
+                    "role": "assistant",
+                    "content": assistant_message.content or "",
+                    "tool_calls": [
+                        {
+                            "id": tc.id,
+                            "type": tc.type,
+                            "function": {
+                                "name": tc.function.name,
+                                "arguments": tc.function.arguments
+                            }
+                        }
+                        for tc in assistant_message.tool_calls
+                    ]
+                })
+                
+                # Execute the tool calls concurrently
+                results = await _execute_tool_calls(user_id, [
+                    (tool_call.function.name, tool_call.function.arguments)
+                    for tool_call in assistant_message.tool_calls
+                ])
+                
+                # Add tool responses to messages, in the original order
+                for tool_call, result in zip(assistant_message.tool_calls, results):
+                    messages.append({
+                        "role": "tool",
+                        "tool_call_id": tool_call.id,
+                        "name": tool_call.function.name,
+                        "content": json.dumps(result)
+                    })
+            else:
+                # No more tool calls, return final response
+                return assistant_message.content or FALLBACK_RESPONSE
+        
+        except Exception as e:
+            # Log error and return friendly message
+            logger.exception("Agent error")
+            return f"I apologize, but I encountered an error: {str(e)}"
+    
+    # Max iterations reached
+    return MAX_ITERATIONS_RESPONSE
+
+
+async def summarize_history(
+    previous_summary: Optional[str],
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    model: str = "gemini-2.5-flash"
+) -> str:
+    """
+    Fold `messages` [{role, content}] into the running conversation summary.
+    
+    Returns the new summary, trimmed to roughly `max_tokens`.
+    """
+    transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+    response = await get_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT.format(max_words=max_tokens * 3 // 4)},
+            {
+                "role": "user",
+                "content": f"Current summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}"
+            }
+        ]
+    )
+    summary = (response.choices[0].message.content or "").strip()
+    # The model usually stays within the word limit; this only guards against
+    # runaway output (about four characters per token)
+    return summary[:max_tokens * 4]
+
+
+def _text_events(shown: List[str], text: str, new_step: bool) -> List[Dict[str, Any]]:
+    """
+    Token events for `text`, recorded in `shown`. The first text of a new
+    step is set apart from text shown by earlier steps.
+    """
+    events = []
+    if new_step and shown:
+        shown.append("\n\n")
+        events.append({"type": "token", "content": "\n\n"})
+    shown.append(text)
+    events.append({"type": "token", "content": text})
+    return events
+
+
+async def stream_agent(
+    user_id: str,
+    message: str,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    model: str = "gemini-2.5-flash"
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of run_agent.
+    
+    Yields events as they arrive from the model:
+        {"type": "token", "content": str}                      - text delta
+        {"type": "tool_call", "name": str}                     - tool about to run
+        {"type": "tool_result", "name": str, "success": bool}  - tool finished
+        {"type": "final", "content": str}                      - full response (always last)
+    
+    The final response is everything streamed as tokens, including text the
+    model wrote before calling tools, so it matches what the client showed.
+    """
+    messages = _build_messages(message, conversation_history)
+    tools = get_mcp_tools()
+    shown: List[str] = []
+    
+    for _ in range(MAX_ITERATIONS):
+        try:
+            stream = await get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                tools=tools,
+                tool_choice="auto",
+                stream=True
+            )
+            
+            content_parts: List[str] = []
+            # Tool calls arrive in fragments, keyed by their index
+            tool_calls: Dict[int, Dict[str, str]] = {}
+            
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                
+                if delta.content:
+                    for event in _text_events(shown, delta.content, new_step=not content_parts):
+                        yield event
+                    content_parts.append(delta.content)
+                
+                for tc in delta.tool_calls or []:
+                    entry = tool_calls.setdefault(
+                        tc.index, {"id": "", "type": "function", "name": "", "arguments": ""}
+                    )
+                    if tc.id:
+                        entry["id"] = tc.id
+                    if tc.function and tc.function.name:
+                        entry["name"] += tc.function.name
+                    if tc.function and tc.function.arguments:
+                        entry["arguments"] += tc.function.arguments
+            
+            content = "".join(content_parts)
+            
+            if not tool_calls:
+                if not shown:
+                    for event in _text_events(shown, FALLBACK_RESPONSE, new_step=True):
+                        yield event
+                yield {"type": "final", "content": "".join(shown)}
+                return
+            
+            ordered_calls = [tool_calls[index] for index in sorted(tool_calls)]
+            messages.append({
+                "role": "assistant",
+                "content": content,
+                "tool_calls": [
+                    {
+                        "id": tc["id"],
+                        "type": tc["type"],
+                        "function": {
+                            "name": tc["name"],
+                            "arguments": tc["arguments"]
+                        }
+                    }
+                    for tc in ordered_calls
+                ]
+            })
+            
+            for tc in ordered_calls:
+                yield {"type": "tool_call", "name": tc["name"]}
+            
+            results = await _execute_tool_calls(
+                user_id, [(tc["name"], tc["arguments"]) for tc in ordered_calls]
+            )
+            
+            for tc, result in zip(ordered_calls, results):
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tc["id"],
+                    "name": tc["name"],
+                    "content": json.dumps(result)
+                })
+                yield {"type": "tool_result", "name": tc["name"], "success": bool(result.get("success"))}
+        
+        except Exception as e:
+            logger.exception("Agent error")
+            error = f"I apologize, but I encountered an error: {str(e)}"
+            for event in _text_events(shown, error, new_step=True):
+                yield event
+            yield {"type": "final", "content": "".join(shown)}
+            return
+    
+    for event in _text_events(shown, MAX_ITERATIONS_RESPONSE, new_step=True):
+        yield event
+    yield {"type": "final", "content": "".join(shown)}
+
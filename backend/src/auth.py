@@ -1,79 +1,297 @@
-import os
-import bcrypt
-import jwt
-from datetime import datetime, timedelta, timezone
-from typing import Optional
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
-
-# JWT settings
-# Use BETTER_AUTH_SECRET if available, otherwise SECRET_KEY
-SECRET_KEY = os.getenv("BETTER_AUTH_SECRET") or os.getenv("SECRET_KEY") or "fallback-secret-key"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
-
-# HTTP Bearer token scheme
-security = HTTPBearer()
-
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    try:
-        return bcrypt.checkpw(
-            plain_password.encode('utf-8'), 
-            hashed_password.encode('utf-8')
-        )
-    except Exception:
-        return False
-
-def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a JWT access token."""
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode = {
-        "sub": user_id,
-        "exp": expire,
-        "iat": datetime.now(timezone.utc)
-    }
-    
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-def verify_token(token: str) -> Optional[str]:
-    """Verify a JWT token and return the user_id if valid."""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-        return user_id
-    except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
-        return None
-
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
-    """FastAPI dependency to get the current authenticated user's ID."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    token = credentials.credentials
-    user_id = verify_token(token)
-    
-    if user_id is None:
-        raise credentials_exception
-    
-    return user_id
+import asyncio
+import bcrypt
+import hashlib
+import jwt
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set, Tuple
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import delete
+from sqlmodel import select
+
+from .config import settings
+
+# JWT settings
+SECRET_KEY = settings.secret_key
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+REFRESH_TOKEN_EXPIRE_DAYS = settings.refresh_token_expire_days
+REVOCATION_SYNC_SECONDS = settings.revocation_sync_seconds
+
+# HTTP Bearer token scheme
+security = HTTPBearer()
+
+logger = logging.getLogger(__name__)
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of already-verified tokens: sha256(token) -> (user_id, jti, exp).
+    
+    Lets repeat requests with the same token skip signature verification.
+    Entries are dropped once the token expires, so an expired token is never
+    accepted from the cache. The jti is kept so revocation is still checked
+    on a hit. One instance is shared per worker process.
+    """
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[str, Optional[str], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, digest: bytes, now: float) -> Optional[Tuple[str, Optional[str]]]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        user_id, jti, exp = entry
+        if exp <= now:
+            del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return user_id, jti
+    
+    def put(self, digest: bytes, user_id: str, jti: Optional[str], exp: float) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[digest] = (user_id, jti, exp)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class RevocationList:
+    """
+    Revoked token ids (jti) -> expiry, checked on every authenticated request.
+    
+    Membership is a dict lookup, so revocation costs no database round trip
+    per request. Revocations are also stored in the revoked_tokens table;
+    each worker merges rows written by other workers every
+    REVOCATION_SYNC_SECONDS (see sync_revocations), so an access token revoked
+    elsewhere stops working here within that interval (or at its expiry,
+    whichever comes first). Entries are dropped once the token has expired:
+    on lookup, and on insert once the list has doubled since the last prune,
+    so it stays bounded even when syncing is off.
+    """
+    
+    # Below this size, inserts never trigger a prune
+    MIN_PRUNE_SIZE = 1024
+    
+    def __init__(self):
+        self._entries: Dict[str, float] = {}
+        self._prune_at = self.MIN_PRUNE_SIZE
+        # Latest revoked_at merged from the database, and when we last looked
+        self.watermark = 0.0
+        self.last_sync = 0.0
+    
+    def __contains__(self, jti: str) -> bool:
+        exp = self._entries.get(jti)
+        if exp is None:
+            return False
+        if exp <= time.time():
+            # Expired tokens fail verification anyway
+            del self._entries[jti]
+            return False
+        return True
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def add(self, jti: str, exp: float) -> None:
+        self._entries[jti] = exp
+        if len(self._entries) >= self._prune_at:
+            self.prune(time.time())
+    
+    def prune(self, now: float) -> None:
+        for jti in [jti for jti, exp in self._entries.items() if exp <= now]:
+            del self._entries[jti]
+        self._prune_at = max(self.MIN_PRUNE_SIZE, 2 * len(self._entries))
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self._prune_at = self.MIN_PRUNE_SIZE
+        self.watermark = 0.0
+        self.last_sync = 0.0
+
+
+token_cache = VerifiedTokenCache(settings.auth_token_cache_size)
+revoked_tokens = RevocationList()
+
+# Rows re-read on each sync, to tolerate clock skew between workers
+# (revoked_at comes from the revoking worker's clock)
+_REVOCATION_SYNC_OVERLAP = 60.0
+_sync_tasks: Set["asyncio.Task[None]"] = set()
+
+# bcrypt work factor for new hashes; existing hashes are upgraded on login
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event
+# loop while bounding how many CPU-heavy hashes run at once
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="bcrypt"
+)
+
+def hash_password(password: str) -> str:
+    """Hash a password using bcrypt."""
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    return hashed.decode('utf-8')
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash."""
+    try:
+        return bcrypt.checkpw(
+            plain_password.encode('utf-8'), 
+            hashed_password.encode('utf-8')
+        )
+    except Exception:
+        return False
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a bcrypt hash was made with a different work factor than BCRYPT_ROUNDS."""
+    try:
+        # Format: $2b$<rounds>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+async def hash_password_async(password: str) -> str:
+    """hash_password, run in the bcrypt thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password, run in the bcrypt thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, verify_password, plain_password, hashed_password
+    )
+
+def _create_token(user_id: str, token_type: str, expires_delta: timedelta) -> str:
+    now = datetime.now(timezone.utc)
+    to_encode = {
+        "sub": user_id,
+        "type": token_type,
+        "jti": uuid.uuid4().hex,
+        "exp": now + expires_delta,
+        "iat": now
+    }
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None) -> str:
+    """Create a short-lived JWT access token."""
+    return _create_token(
+        user_id, "access", expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+def create_refresh_token(user_id: str, expires_delta: Optional[timedelta] = None) -> str:
+    """Create a JWT refresh token, exchanged for new tokens at /api/auth/refresh."""
+    return _create_token(
+        user_id, "refresh", expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+
+def decode_token(token: str, token_type: str = "access") -> Optional[Dict[str, Any]]:
+    """Verify a JWT's signature, expiry and type, and return its claims if valid."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
+        return None
+    # Tokens issued before refresh tokens existed have no type: treat them as access tokens
+    if payload.get("sub") is None or payload.get("type", "access") != token_type:
+        return None
+    return payload
+
+def verify_token(token: str) -> Optional[str]:
+    """Verify a JWT access token and return the user_id if valid and not revoked."""
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    now = time.time()
+    
+    cached = token_cache.get(digest, now)
+    if cached is not None:
+        user_id, jti = cached
+    else:
+        payload = decode_token(token)
+        if payload is None:
+            return None
+        user_id, jti = payload["sub"], payload.get("jti")
+        # Tokens without an expiry are still accepted, just not cached
+        exp = payload.get("exp")
+        if exp is not None:
+            token_cache.put(digest, user_id, jti, float(exp))
+    
+    if jti is not None and jti in revoked_tokens:
+        return None
+    return user_id
+
+async def sync_revocations() -> None:
+    """
+    Merge revocations recorded by other workers into revoked_tokens, and
+    delete rows for tokens that have since expired.
+    """
+    # Imported here so token verification alone doesn't need the database engine
+    from .database import async_session
+    from .models import RevokedToken
+    
+    now = time.time()
+    since = revoked_tokens.watermark - _REVOCATION_SYNC_OVERLAP
+    async with async_session() as session:
+        rows = (await session.exec(
+            select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+            .where(RevokedToken.revoked_at > since, RevokedToken.expires_at > now)
+        )).all()
+        # An expired token is rejected on its exp claim alone, so its row is
+        # no longer needed; every worker may run this, which is harmless
+        await session.exec(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        await session.commit()
+    
+    for jti, expires_at, revoked_at in rows:
+        revoked_tokens.add(jti, float(expires_at))
+        revoked_tokens.watermark = max(revoked_tokens.watermark, revoked_at)
+    revoked_tokens.prune(now)
+
+async def _run_sync_revocations() -> None:
+    try:
+        await sync_revocations()
+    except Exception:
+        logger.exception("Failed to sync revoked tokens")
+
+def _schedule_revocation_sync(now: float) -> None:
+    """Start a background sync if one is due; the request never waits for it."""
+    if REVOCATION_SYNC_SECONDS <= 0 or _sync_tasks:
+        return
+    if now - revoked_tokens.last_sync < REVOCATION_SYNC_SECONDS:
+        return
+    revoked_tokens.last_sync = now
+    task = asyncio.get_running_loop().create_task(_run_sync_revocations())
+    _sync_tasks.add(task)
+    task.add_done_callback(_sync_tasks.discard)
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    """FastAPI dependency to get the current authenticated user's ID."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    _schedule_revocation_sync(time.time())
+    
+    token = credentials.credentials
+    user_id = verify_token(token)
+    
+    if user_id is None:
+        raise credentials_exception
+    
+    return user_id
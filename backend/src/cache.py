@@ -0,0 +1,183 @@
+"""
+Key-value store for per-user data versions and cached task lists.
+
+In-process by default. Set CACHE_URL (redis://...) to share it between
+workers and instances through Redis, or any server speaking its protocol;
+that needs the optional `redis` package.
+
+Cached values are keyed by the user's current data version, so bumping the
+version after a write invalidates every cached listing of that user at once;
+entries under old versions are never read again and age out.
+"""
+
+import json
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .config import settings
+
+# Version scopes: a write to any row in the scope changes its version
+TASKS = "tasks"
+CHAT = "chat"  # conversations and their messages
+
+
+class MemoryStore:
+    """
+    Bounded LRU dict, capped by entry count and by the size of its strings.
+
+    Evicting a version only costs one full response. Entries given a TTL
+    expire like they would in Redis, which bounds how long a cached list can
+    outlive a write made through another process.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        # key -> (value, expiry on the monotonic clock or None)
+        self._data: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._data.pop(key)
+        self.size -= len(key) + len(value)
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        if key in self._data:
+            self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        self.size += len(key) + len(value)
+        while self._data and (len(self._data) > self.max_entries or self.size > self.max_bytes):
+            self._remove(next(iter(self._data)))
+
+    async def set_if_absent(self, key: str, value: str) -> str:
+        """Store `value` unless `key` exists; return the stored value."""
+        current = await self.get(key)
+        if current is not None:
+            return current
+        await self.set(key, value)
+        return value
+
+
+class RedisStore:
+    """The same interface on a Redis server shared by all workers."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "CACHE_URL is set but the redis package is not installed (pip install redis)"
+            ) from e
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        await self._redis.set(key, value, ex=ttl)
+
+    async def set_if_absent(self, key: str, value: str) -> str:
+        if await self._redis.set(key, value, nx=True):
+            return value
+        return await self._redis.get(key) or value
+
+
+store = (
+    RedisStore(settings.cache_url) if settings.cache_url
+    else MemoryStore(settings.cache_max_entries, settings.cache_max_bytes)
+)
+
+
+class CacheStats:
+    """Hit/miss counters of the list cache, per worker process."""
+
+    def __init__(self):
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        stats = {
+            "enabled": settings.task_cache,
+            "backend": "redis" if settings.cache_url else "memory",
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "by_name": {
+                name: {"hits": self.hits[name], "misses": self.misses[name]}
+                for name in sorted(set(self.hits) | set(self.misses))
+            },
+        }
+        if isinstance(store, MemoryStore):
+            stats["entries"] = len(store)
+            stats["bytes"] = store.size
+        return stats
+
+
+cache_stats = CacheStats()
+
+
+def _version_key(user_id: str, scope: str) -> str:
+    return f"version:{scope}:{user_id}"
+
+
+async def get_version(user_id: str, scope: str) -> str:
+    """
+    Current version of a user's data in `scope`.
+
+    Versions are random tokens rather than counters, so a restarted worker
+    or an evicted entry can never reissue a version a client already holds.
+    """
+    return await store.set_if_absent(_version_key(user_id, scope), uuid.uuid4().hex)
+
+
+async def bump_version(user_id: str, scope: str) -> None:
+    """Mark a user's data in `scope` as changed. Call after the write commits."""
+    await store.set(_version_key(user_id, scope), uuid.uuid4().hex)
+
+
+async def cached(
+    user_id: str,
+    scope: str,
+    name: str,
+    params: Dict[str, Any],
+    load: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Return `load()`'s JSON-serializable result, cached per user and `params`.
+
+    The version is read before loading, so a write committed meanwhile
+    stores the result under a version that is already stale, never the
+    current one. Exceptions from `load` propagate and nothing is cached.
+    """
+    if not settings.task_cache:
+        return await load()
+
+    version = await get_version(user_id, scope)
+    key = f"cache:{scope}:{user_id}:{version}:{name}:{json.dumps(params, sort_keys=True)}"
+    value = await store.get(key)
+    if value is not None:
+        cache_stats.hits[name] += 1
+        return json.loads(value)
+
+    cache_stats.misses[name] += 1
+    result = await load()
+    await store.set(key, json.dumps(result), ttl=settings.cache_ttl_seconds)
+    return result
@@ -0,0 +1,118 @@
+"""Application settings, read from the environment once at import."""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+from dotenv import load_dotenv
+
+# Load environment variables from the backend directory's .env file
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Database
+    database_url: Optional[str]
+    db_echo: bool
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float
+    db_pool_recycle: int
+    db_pool_pre_ping: bool
+    # "queue" keeps connections open in-process; "null" opens one per checkout and is
+    # meant for serverless instances (Vercel sets VERCEL=1) or an external pooler
+    db_pool_mode: str
+    # PgBouncer in transaction mode can't use server-side prepared statements
+    db_pgbouncer: bool
+
+    # Auth
+    # Use BETTER_AUTH_SECRET if available, otherwise SECRET_KEY
+    secret_key: str
+    # Access tokens are short-lived; clients renew them with a refresh token
+    access_token_expire_minutes: int
+    refresh_token_expire_days: int
+    # How often each worker pulls revocations made by other workers (0 = never)
+    revocation_sync_seconds: float
+    # Max verified tokens remembered per worker (0 disables the cache)
+    auth_token_cache_size: int
+    # bcrypt work factor, and how many hashes may run in parallel per worker
+    bcrypt_rounds: int
+    password_hash_workers: int
+
+    # Shared store for data versions and cached task lists (redis://...);
+    # in-process when unset
+    cache_url: Optional[str]
+    cache_max_entries: int
+    cache_max_bytes: int
+    cache_ttl_seconds: int
+    # ETag / If-None-Match on list endpoints. ETags carry data versions, which
+    # only the worker that bumped them sees unless cache_url is set, so another
+    # worker could answer 304 for a stale list: off by default without a shared
+    # store (set CONDITIONAL_GET=1 for a single worker process).
+    conditional_get: bool
+    # The task list cache. Keyed by data version too, so another worker could
+    # serve a list cached before a write it didn't see: likewise off by default
+    # without a shared store (TASK_CACHE=1 for a single worker process).
+    task_cache: bool
+    # Delivery of task change events to GET /api/tasks/stream: "memory" reaches
+    # streams on the same worker only, "postgres" uses LISTEN/NOTIFY
+    task_events_backend: str
+
+    # LLM (Google Gemini through its OpenAI-compatible API by default)
+    google_api_key: Optional[str]
+    llm_base_url: str
+    # Estimated tokens of conversation history (summary included) sent per turn;
+    # older turns are folded into the conversation's running summary
+    history_token_budget: int
+    history_summary_tokens: int
+    # Answer simple chat requests ("show my tasks") without calling the LLM
+    intent_router: bool
+
+    # Serve pool, intent router and cache counters under /health/*; they
+    # describe the deployment, so they are off unless asked for
+    health_details: bool
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        cache_url = os.getenv("CACHE_URL") or os.getenv("REDIS_URL")
+        return cls(
+            database_url=os.getenv("DATABASE_URL"),
+            db_echo=_env_bool("DB_ECHO", False),
+            db_pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            db_pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            db_pool_mode=os.getenv("DB_POOL_MODE", "null" if os.getenv("VERCEL") else "queue").lower(),
+            db_pgbouncer=_env_bool("DB_PGBOUNCER", False),
+            secret_key=os.getenv("BETTER_AUTH_SECRET") or os.getenv("SECRET_KEY") or "fallback-secret-key",
+            access_token_expire_minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15")),
+            refresh_token_expire_days=int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7")),
+            revocation_sync_seconds=float(os.getenv("REVOCATION_SYNC_SECONDS", "30")),
+            auth_token_cache_size=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")),
+            bcrypt_rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+            password_hash_workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+            cache_url=cache_url,
+            cache_max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "100000")),
+            cache_max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            cache_ttl_seconds=int(os.getenv("CACHE_TTL_SECONDS", "3600")),
+            conditional_get=_env_bool("CONDITIONAL_GET", bool(cache_url)),
+            task_cache=_env_bool("TASK_CACHE", bool(cache_url)),
+            task_events_backend=os.getenv("TASK_EVENTS_BACKEND", "memory").lower(),
+            google_api_key=os.getenv("GOOGLE_API_KEY"),
+            llm_base_url=os.getenv("LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+            history_token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "3000")),
+            history_summary_tokens=int(os.getenv("HISTORY_SUMMARY_TOKENS", "400")),
+            intent_router=_env_bool("INTENT_ROUTER", True),
+            health_details=_env_bool("HEALTH_DETAILS", False),
+        )
+
+
+settings = Settings.from_env()
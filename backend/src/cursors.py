@@ -0,0 +1,61 @@
+"""
+Opaque pagination cursors: a JSON object, URL-safe base64 encoded.
+
+Every field read back from a client's cursor goes through cursor_value, so
+a tampered or truncated cursor raises InvalidCursor (reported as 400)
+rather than reaching a query with the wrong type.
+"""
+
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+
+# Range of a BIGINT id column; a larger id can't be bound to a query
+_INT64_MIN, _INT64_MAX = -2**63, 2**63 - 1
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """Encode a JSON-serializable dict as a cursor string."""
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor string back into its dict."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(payload, dict):
+        raise InvalidCursor("Invalid cursor")
+    return payload
+
+
+def cursor_value(value: Any, kind: type) -> Any:
+    """
+    A cursor field as `kind`: int (a JSON integer in the database's BIGINT
+    range, as for row ids), str, bool or datetime (from ISO 8601, and
+    representable in UTC).
+    """
+    try:
+        if kind is int and isinstance(value, int) and not isinstance(value, bool):
+            if not _INT64_MIN <= value <= _INT64_MAX:
+                raise InvalidCursor("Invalid cursor")
+            return value
+        if kind is datetime and isinstance(value, str):
+            parsed = datetime.fromisoformat(value)
+            if parsed.tzinfo is not None:
+                # The database compares in UTC: year 1 at +05:00 has no UTC time
+                parsed.astimezone(timezone.utc)
+            return parsed
+        if kind in (str, bool) and isinstance(value, kind):
+            return value
+    except (TypeError, ValueError, OverflowError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    raise InvalidCursor("Invalid cursor")
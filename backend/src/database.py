@@ -1,23 +1,126 @@
-import os
-from dotenv import load_dotenv
-from sqlmodel import create_engine, Session
-
-# Load environment variables from the parent directory's .env file
-load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set")
-
-# Neon connection string usually needs some adjustments for SQLAlchemy if using pooling,
-# but for basic direct connection it works as is.
-# We ensure it's postgresql:// not postgres://
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-
-engine = create_engine(DATABASE_URL, echo=True)
-
-def get_session():
-    with Session(engine) as session:
-        yield session
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .config import settings
+
+DATABASE_URL = settings.database_url
+
+if not DATABASE_URL:
+    raise ValueError("DATABASE_URL environment variable is not set")
+
+# Neon connection string usually needs some adjustments for SQLAlchemy if using pooling,
+# but for basic direct connection it works as is.
+# We ensure it's postgresql:// not postgres://
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+
+def to_async_url(url: str):
+    """
+    Convert a database URL to its async driver equivalent.
+
+    asyncpg does not understand libpq query parameters such as sslmode or
+    channel_binding (used in Neon connection strings), so they are turned
+    into connect args. SQLite URLs (local development) use aiosqlite.
+    """
+    parsed = make_url(url)
+    connect_args = {}
+
+    if parsed.drivername in ("postgresql", "postgresql+psycopg2"):
+        query = dict(parsed.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = "require"
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    elif parsed.drivername == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+
+    return parsed, connect_args
+
+
+ASYNC_DATABASE_URL, _connect_args = to_async_url(DATABASE_URL)
+
+_engine_kwargs = {"echo": settings.db_echo, "pool_pre_ping": settings.db_pool_pre_ping}
+
+if settings.db_pgbouncer and ASYNC_DATABASE_URL.drivername == "postgresql+asyncpg":
+    _connect_args["statement_cache_size"] = 0
+    ASYNC_DATABASE_URL = ASYNC_DATABASE_URL.update_query_dict({"prepared_statement_cache_size": "0"})
+
+if settings.db_pool_mode == "null":
+    _engine_kwargs["poolclass"] = NullPool
+elif ASYNC_DATABASE_URL.get_backend_name() != "sqlite":
+    _engine_kwargs.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+
+engine = create_async_engine(ASYNC_DATABASE_URL, connect_args=_connect_args, **_engine_kwargs)
+
+# Counters for sizing the pool from real traffic (see pool_status)
+_pool_stats = {
+    "checkouts": 0,
+    "peak_checked_out": 0,
+    "checkouts_at_capacity": 0,
+    "timeouts": 0,
+}
+
+
+@event.listens_for(engine.sync_engine.pool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool = engine.sync_engine.pool
+    _pool_stats["checkouts"] += 1
+    if isinstance(pool, QueuePool):
+        checked_out = pool.checkedout()
+        _pool_stats["peak_checked_out"] = max(_pool_stats["peak_checked_out"], checked_out)
+        # This checkout took the last free connection; the next caller waits
+        # (and may hit `timeouts`) until one is returned
+        if checked_out >= pool.size() + settings.db_max_overflow:
+            _pool_stats["checkouts_at_capacity"] += 1
+
+
+def pool_status() -> Dict[str, Any]:
+    """Current pool occupancy plus cumulative checkout/timeout counters."""
+    pool = engine.sync_engine.pool
+    status = {"mode": settings.db_pool_mode, **_pool_stats}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            max_overflow=settings.db_max_overflow,
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return status
+
+# Keep attributes loaded after commit - lazy refreshes can't happen implicitly
+# in async code
+_session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@asynccontextmanager
+async def async_session() -> AsyncIterator[AsyncSession]:
+    """
+    A new session, for code outside request handlers (MCP tools, background work).
+
+    Counts pool timeouts raised while it is open, for pool_status.
+    """
+    async with _session_factory() as session:
+        try:
+            yield session
+        except PoolTimeoutError:
+            _pool_stats["timeouts"] += 1
+            raise
+
+
+async def get_session():
+    async with async_session() as session:
+        yield session
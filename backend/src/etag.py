@@ -0,0 +1,51 @@
+"""Conditional GET (ETag / If-None-Match) for per-user listings."""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from .cache import get_version
+from .config import settings
+
+# Clients must revalidate every time; the ETag makes that cheap
+_CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match header value."""
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+async def not_modified(
+    request: Request, response: Response, user_id: str, scope: str
+) -> Optional[Response]:
+    """
+    Tag a listing with the user's current data version.
+
+    Returns a 304 response if the client's copy is current, in which case
+    the handler returns it without querying. Otherwise sets the ETag on
+    `response` and returns None. Must run before the query, so a write
+    landing in between yields a newer body under the older tag (refetched
+    next time) and never the reverse.
+    """
+    if not settings.conditional_get:
+        return None
+
+    version = await get_version(user_id, scope)
+    # The same data version renders differently per path and query string
+    target = f"{request.url.path}?{request.url.query}".encode("utf-8")
+    etag = f'W/"{version}.{hashlib.sha256(target).hexdigest()[:16]}"'
+
+    headers = {"ETag": etag, **_CACHE_HEADERS}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,214 @@
+"""
+Per-user task change events, for GET /api/tasks/stream.
+
+Write paths publish `task_created`, `task_updated` and `task_deleted` events
+once they commit, and every open stream of that user receives them. By
+default delivery is in-process, so a stream only sees writes handled by the
+same worker. With TASK_EVENTS_BACKEND=postgres, events are relayed through
+LISTEN/NOTIFY, so every worker and instance sees every write.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from sqlalchemy import func, select
+
+from .config import settings
+from .database import engine
+from .schemas import TaskResponse
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per stream. A client that falls this far behind gets a
+# `resync` event instead and should refetch its list.
+MAX_QUEUED_EVENTS = 256
+
+RESYNC = {"type": "resync"}
+
+
+def task_event(kind: str, task: Any) -> Dict[str, Any]:
+    """A `task_created` / `task_updated` event carrying the task as the API returns it."""
+    return {"type": f"task_{kind}", "task": TaskResponse.model_validate(task).model_dump(mode="json")}
+
+
+def task_deleted(task_id: int) -> Dict[str, Any]:
+    return {"type": "task_deleted", "id": task_id}
+
+
+def sse_frame(event: Dict[str, Any]) -> str:
+    """Format an event as a Server-Sent Events data frame."""
+    return f"data: {json.dumps(event)}\n\n"
+
+
+class TaskEvents:
+    """In-process pub/sub of task events, keyed by user."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Queue receiving the user's events while the context is open."""
+        queue: asyncio.Queue = asyncio.Queue(MAX_QUEUED_EVENTS)
+        self._subscribers[user_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers[user_id]
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[user_id]
+
+    def _deliver(self, user_id: str, events: List[Dict[str, Any]]) -> None:
+        for queue in self._subscribers.get(user_id, ()):
+            for event in events:
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Replace the backlog; the client refetches instead
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(RESYNC)
+                    break
+
+    def _resync_all(self) -> None:
+        for user_id in list(self._subscribers):
+            self._deliver(user_id, [RESYNC])
+
+    async def publish(self, user_id: str, events: List[Dict[str, Any]]) -> None:
+        """Send events to the user's streams. Call after the write commits."""
+        if events:
+            self._deliver(user_id, events)
+
+    async def close(self) -> None:
+        pass
+
+
+class PostgresTaskEvents(TaskEvents):
+    """
+    Relays events through Postgres LISTEN/NOTIFY.
+
+    One pooled connection per worker listens, from the first subscription
+    until shutdown. LISTEN does not work through PgBouncer in transaction
+    mode; point DATABASE_URL at the server directly when using this backend.
+    """
+
+    CHANNEL = "task_events"
+    # Postgres caps NOTIFY payloads at 8000 bytes
+    MAX_PAYLOAD_BYTES = 7900
+    # How long a new subscription waits for the listener to connect
+    CONNECT_TIMEOUT_SECONDS = 5
+
+    def __init__(self):
+        super().__init__()
+        self._listener: Optional[asyncio.Task] = None
+        self._listening = asyncio.Event()
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: str) -> AsyncIterator[asyncio.Queue]:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        async with super().subscribe(user_id) as queue:
+            try:
+                await asyncio.wait_for(self._listening.wait(), self.CONNECT_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                # Still retrying; the stream gets a resync once it connects
+                pass
+            yield queue
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        message = json.loads(payload)
+        self._deliver(message["user_id"], message["events"])
+
+    async def _listen(self) -> None:
+        reconnecting = False
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    raw = (await conn.get_raw_connection()).driver_connection
+                    lost = asyncio.Event()
+                    raw.add_termination_listener(lambda _: lost.set())
+                    await raw.add_listener(self.CHANNEL, self._on_notify)
+                    self._listening.set()
+                    try:
+                        if reconnecting:
+                            # Events published while disconnected were missed
+                            self._resync_all()
+                        await lost.wait()
+                    finally:
+                        self._listening.clear()
+                        if not raw.is_closed():
+                            await raw.remove_listener(self.CHANNEL, self._on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task event listener failed; reconnecting")
+            # Also covers a first connection that failed after streams subscribed
+            reconnecting = True
+            await asyncio.sleep(1)
+
+    def _payloads(self, user_id: str, events: List[Dict[str, Any]]) -> List[str]:
+        """
+        Pack events into as few NOTIFY payloads as fit the size limit.
+        
+        An event too large for a payload of its own (a task with a long,
+        mostly non-ASCII description) is sent as a `resync` instead, so its
+        streams refetch rather than miss it.
+        """
+        # Joined as json.dumps would join them; its output is ASCII, so the
+        # length in characters is the length in bytes
+        def payload(encoded: List[str]) -> str:
+            return '{"user_id": %s, "events": [%s]}' % (json.dumps(user_id), ", ".join(encoded))
+        
+        envelope = len(payload([]))
+        resync = json.dumps(RESYNC)
+        payloads: List[str] = []
+        batch: List[str] = []
+        size = envelope
+        for event in events:
+            encoded = json.dumps(event)
+            if envelope + len(encoded) > self.MAX_PAYLOAD_BYTES:
+                if resync in batch:
+                    continue
+                encoded = resync
+            added = len(encoded) + (2 if batch else 0)
+            if batch and size + added > self.MAX_PAYLOAD_BYTES:
+                payloads.append(payload(batch))
+                batch, size, added = [], envelope, len(encoded)
+            batch.append(encoded)
+            size += added
+        if batch:
+            payloads.append(payload(batch))
+        return payloads
+    
+    async def publish(self, user_id: str, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        try:
+            async with engine.begin() as conn:
+                for payload in self._payloads(user_id, events):
+                    await conn.execute(select(func.pg_notify(self.CHANNEL, payload)))
+        except Exception:
+            # The write itself has committed; streams will just miss it
+            logger.exception("Failed to publish task events for user %s", user_id)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+if settings.task_events_backend == "postgres":
+    if engine.dialect.name != "postgresql":
+        raise ValueError("TASK_EVENTS_BACKEND=postgres needs a PostgreSQL DATABASE_URL")
+    task_events: TaskEvents = PostgresTaskEvents()
+else:
+    task_events = TaskEvents()
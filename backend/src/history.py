@@ -0,0 +1,52 @@
+"""Token-budgeted conversation history for the agent prompt."""
+
+import math
+import re
+from typing import List, Sequence, Tuple
+
+from .models import Message
+
+# Roughly what chat formats add per message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Prefix for the stored running summary when it is sent to the agent
+SUMMARY_CONTEXT = "Summary of the earlier part of this conversation:\n"
+
+_TOKEN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of `text` without a model-specific tokenizer.
+
+    Subword tokenizers split long words into pieces of about four
+    characters and give most punctuation its own token; counting that way
+    lands close to the real count for English text.
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in _TOKEN.findall(text))
+
+
+def message_tokens(message: Message) -> int:
+    return estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def select_history(
+    messages_newest_first: Sequence[Message], budget: int
+) -> Tuple[List[Message], List[Message]]:
+    """
+    Split messages into the most recent ones that fit in `budget` tokens and
+    the older rest.
+
+    Both lists are returned in chronological order. The window is always a
+    contiguous run of the latest messages, so the prompt never skips a turn.
+    """
+    used = 0
+    cut = len(messages_newest_first)
+    for index, message in enumerate(messages_newest_first):
+        used += message_tokens(message)
+        if used > budget:
+            cut = index
+            break
+    recent = list(reversed(messages_newest_first[:cut]))
+    older = list(reversed(messages_newest_first[cut:]))
+    return recent, older
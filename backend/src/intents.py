@@ -0,0 +1,195 @@
+"""
+Fast path for simple chat messages, answered without the LLM.
+
+A small rule-based classifier recognises unambiguous requests ("show my
+tasks", "what's pending?", "mark task 12 as done"), runs the matching tool
+and renders a templated reply. Anything it is not confident about returns
+None and goes to the agent as usual.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlmodel import select
+
+from .database import async_session
+from .models import Task
+from .mcp.tools import complete_task, list_tasks
+
+
+@dataclass
+class RoutedReply:
+    """A message answered by the fast path."""
+    intent: str
+    tool: str
+    success: bool
+    response: str
+
+
+class RouterStats:
+    """Hit/fallback counters for the fast path, per worker process."""
+
+    def __init__(self):
+        self.messages = 0
+        self.hits: Counter = Counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        total_hits = sum(self.hits.values())
+        return {
+            "messages": self.messages,
+            "hits": total_hits,
+            "fallbacks": self.messages - total_hits,
+            "hit_rate": round(total_hits / self.messages, 4) if self.messages else 0.0,
+            "hits_by_intent": dict(self.hits),
+        }
+
+
+router_stats = RouterStats()
+
+# Politeness that doesn't change the request
+_FILLER = re.compile(r"^(?:(?:hey|hi|ok|okay|so)[, ]+)?(?:(?:can|could|would|will) you |please |pls )*")
+_TRAILING = re.compile(r"(?:[ ,]+(?:please|pls|thanks|thank you))*[\s?!.]*$")
+
+_STATUS_WORDS = {
+    "pending": "pending", "open": "pending", "remaining": "pending", "active": "pending",
+    "incomplete": "pending", "unfinished": "pending", "left": "pending", "outstanding": "pending",
+    "completed": "completed", "done": "completed", "finished": "completed", "complete": "completed",
+}
+_STATUS = "|".join(_STATUS_WORDS)
+
+_LIST_PATTERNS = [
+    # "show my tasks", "list all pending todos", "my completed tasks", "what are my tasks"
+    re.compile(
+        r"^(?:(?:show|list|display|view|see|get|give)(?: me)?|what(?:'s| is| are)|whats)?\s*"
+        r"(?:all\s+)?(?:of\s+)?(?:my|the)?\s*(?P<status>" + _STATUS + r")?\s*"
+        r"(?:tasks|todos|to-dos|to dos|todo list|to-do list|task list)$"
+    ),
+    # "what's pending", "what is left", "what's still open"
+    re.compile(r"^what(?:'s| is|s) (?:still )?(?P<status>" + _STATUS + r")$"),
+    # "what do I have to do", "what do I still need to do"
+    re.compile(r"^what do i (?:still )?(?:have|need) to do(?P<status>)$"),
+]
+
+_DONE = r"(?:done|complete|completed|finished)"
+# A bare number could be a position in a list the agent showed, so an ID
+# needs "task" or "#" in front of it
+_TASK_ID = r"(?:task #?|#)(?P<id>\d+)"
+_COMPLETE_BY_ID = [
+    # "mark task 12 as done", "set #12 complete"
+    re.compile(r"^(?:mark|set) " + _TASK_ID + r" (?:as )?" + _DONE + r"$"),
+    # "complete task 12", "finish #12", "check off task #12"
+    re.compile(r"^(?:complete|finish|check off|tick off) " + _TASK_ID + r"$"),
+]
+_COMPLETE_BY_TITLE = [
+    # "mark buy milk as done", "mark the 'buy milk' task complete"
+    re.compile(
+        r"^(?:mark|set) (?:the )?(?:task )?[\"']?(?P<title>.+?)[\"']?(?: task)? (?:as )?" + _DONE + r"$"
+    ),
+    # "complete buy milk", "check off the 'buy milk' task"
+    re.compile(
+        r"^(?:complete|finish|check off|tick off) (?:the )?(?:task )?[\"']?(?P<title>.+?)[\"']?(?: task)?$"
+    ),
+]
+
+
+def _normalize(message: str) -> str:
+    text = " ".join(message.lower().split())
+    text = _FILLER.sub("", text)
+    return _TRAILING.sub("", text)
+
+
+def _render_task_list(tasks: List[Dict[str, Any]], status: str) -> str:
+    label = "" if status == "all" else f"{status} "
+    if not tasks:
+        return f"You don't have any {label}tasks right now."
+    # Bulleted, not numbered: the only number shown is the ID, so "finish 2"
+    # can't mean the second line
+    lines = [
+        f"- {'✅' if task['completed'] else '⬜'} **{task['title']}** (ID {task['id']})"
+        for task in tasks
+    ]
+    noun = "task" if len(tasks) == 1 else "tasks"
+    return f"You have {len(tasks)} {label}{noun}:\n\n" + "\n".join(lines)
+
+
+async def _find_pending_by_title(user_id: str, title: str) -> Optional[int]:
+    """ID of the user's only pending task titled exactly `title` (ignoring case)."""
+    async with async_session() as session:
+        ids = (await session.exec(
+            select(Task.id)
+            .where(
+                Task.user_id == user_id,
+                Task.completed == False,
+                func.lower(Task.title) == title
+            )
+            .limit(2)
+        )).all()
+    return ids[0] if len(ids) == 1 else None
+
+
+async def _complete(user_id: str, task_id: int) -> Optional[RoutedReply]:
+    result = await complete_task(user_id, task_id)
+    if not result["success"]:
+        # Not found (maybe the user meant a list position) or a database
+        # error: let the agent handle it
+        return None
+    return RoutedReply(
+        intent="complete_task",
+        tool="complete_task",
+        success=True,
+        response=f"Nice work! 🎉 **{result['title']}** is marked as completed."
+    )
+
+
+async def _route(user_id: str, text: str) -> Optional[RoutedReply]:
+    for pattern in _LIST_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            status = _STATUS_WORDS.get(match.group("status") or "", "all")
+            result = await list_tasks(user_id, status)
+            if not result["success"]:
+                return None
+            return RoutedReply(
+                intent="list_tasks",
+                tool="list_tasks",
+                success=True,
+                response=_render_task_list(result["tasks"], status)
+            )
+
+    for pattern in _COMPLETE_BY_ID:
+        match = pattern.match(text)
+        if match:
+            return await _complete(user_id, int(match.group("id")))
+
+    for pattern in _COMPLETE_BY_TITLE:
+        match = pattern.match(text)
+        if match:
+            if match.group("title").isdigit():
+                # A bare number: a list position or an ID, not a title
+                return None
+            task_id = await _find_pending_by_title(user_id, match.group("title"))
+            if task_id is None:
+                return None
+            return await _complete(user_id, task_id)
+
+    return None
+
+
+async def route_message(user_id: str, message: str) -> Optional[RoutedReply]:
+    """
+    Answer `message` without the LLM if it is a simple, unambiguous request.
+
+    Returns None when the message should go to the agent.
+    """
+    router_stats.messages += 1
+    try:
+        reply = await _route(user_id, _normalize(message))
+    except Exception:
+        # The agent can still answer (or report the error properly)
+        return None
+    if reply is not None:
+        router_stats.hits[reply.intent] += 1
+    return reply
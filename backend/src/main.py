@@ -1,59 +1,94 @@
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import SQLModel
-
-from .database import engine
-from .routes import auth, tasks, chat
-
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Create database tables on startup."""
-    SQLModel.metadata.create_all(engine)
-    yield
-
-
-app = FastAPI(
-    title="Todo App API",
-    description="FastAPI backend for the Todo application",
-    version="1.0.0",
-    lifespan=lifespan
-)
-
-# CORS middleware - allow frontend origins
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-        "https://ai-powered-taskflow.vercel.app/",
-        "https://todo-app-api-jade.vercel.app",
-        "*"  # Allow all origins for development - restrict in production
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth.router)
-app.include_router(tasks.router)
-app.include_router(chat.router)
-
-
-@app.get("/health")
-def health_check():
-    """Health check endpoint."""
-    return {"status": "ok", "message": "Backend is running"}
-
-
-@app.get("/")
-def root():
-    """Root endpoint."""
-    return {"message": "Welcome to Todo App API", "docs": "/docs"}
-
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.middleware.cors import CORSMiddleware
+
+from .cache import cache_stats
+from .config import settings
+from .database import engine, pool_status
+from .events import task_events
+from .intents import router_stats
+from .routes import auth, tasks, chat
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Stop the task event listener and release pooled database connections
+    on shutdown.
+    
+    The schema is managed by Alembic migrations (`alembic upgrade head`),
+    so startup doesn't touch the database.
+    """
+    yield
+    await task_events.close()
+    await engine.dispose()
+
+
+app = FastAPI(
+    title="Todo App API",
+    description="FastAPI backend for the Todo application",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# CORS middleware - allow frontend origins
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=[
+        "http://localhost:3000",
+        "http://127.0.0.1:3000",
+        "https://ai-powered-taskflow.vercel.app/",
+        "https://todo-app-api-jade.vercel.app",
+        "*"  # Allow all origins for development - restrict in production
+    ],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
+)
+
+# Include routers
+app.include_router(auth.router)
+app.include_router(tasks.router)
+app.include_router(chat.router)
+
+
+@app.get("/health")
+def health_check():
+    """Health check endpoint."""
+    return {"status": "ok", "message": "Backend is running"}
+
+
+def require_health_details():
+    """Hide the detailed health endpoints unless HEALTH_DETAILS is set."""
+    if not settings.health_details:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+@app.get("/health/db", dependencies=[Depends(require_health_details)])
+def db_pool_health():
+    """Connection pool occupancy and checkout counters, for sizing the pool."""
+    return pool_status()
+
+
+@app.get("/health/intents", dependencies=[Depends(require_health_details)])
+def intent_router_health():
+    """How many chat messages the fast path answered without the LLM."""
+    return router_stats.as_dict()
+
+
+@app.get("/health/cache", dependencies=[Depends(require_health_details)])
+def cache_health():
+    """Task list cache hit/miss counters and, in-process, its size."""
+    return cache_stats.as_dict()
+
+
+@app.get("/")
+def root():
+    """Root endpoint."""
+    return {"message": "Welcome to Todo App API", "docs": "/docs"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,5 +1,5 @@
-"""MCP (Model Context Protocol) package for task management tools."""
-
-from .server import get_mcp_tools
-
-__all__ = ["get_mcp_tools"]
+"""MCP (Model Context Protocol) package for task management tools."""
+
+from .server import get_mcp_tools
+
+__all__ = ["get_mcp_tools"]
@@ -1,51 +1,136 @@
-"""Tool parameter and response schemas for MCP tools."""
-
-from typing import Optional, List
-from pydantic import BaseModel, Field
-
-
-class TaskInfo(BaseModel):
-    """Information about a task."""
-    id: int
-    title: str
-    description: Optional[str]
-    completed: bool
-    created_at: str
-
-
-class ToolResponse(BaseModel):
-    """Standard response format for all tools."""
-    success: bool
-    message: Optional[str] = None
-    error: Optional[str] = None
-
-
-class AddTaskResponse(ToolResponse):
-    """Response from add_task tool."""
-    task_id: Optional[int] = None
-    title: Optional[str] = None
-
-
-class ListTasksResponse(ToolResponse):
-    """Response from list_tasks tool."""
-    count: Optional[int] = None
-    tasks: Optional[List[TaskInfo]] = None
-
-
-class CompleteTaskResponse(ToolResponse):
-    """Response from complete_task tool."""
-    task_id: Optional[int] = None
-    title: Optional[str] = None
-    completed: Optional[bool] = None
-
-
-class DeleteTaskResponse(ToolResponse):
-    """Response from delete_task tool."""
-    task_id: Optional[int] = None
-
-
-class UpdateTaskResponse(ToolResponse):
-    """Response from update_task tool."""
-    task_id: Optional[int] = None
-    title: Optional[str] = None
-    description: Optional[str] = None
+"""Tool parameter and response schemas for MCP tools."""
+
+from typing import Optional, List, Literal
+from pydantic import BaseModel, Field
+
+
+# ============ Tool Arguments ============
+# The function calling schema sent to the model is generated from these, and
+# the model's arguments are validated against them before a tool runs.
+# user_id is never taken from the model: it comes from the JWT.
+
+TaskStatus = Literal["all", "pending", "completed"]
+
+
+class AddTaskArgs(BaseModel):
+    title: str = Field(..., description="Task title (max 200 characters)")
+    description: Optional[str] = Field(
+        default=None, description="Task description (optional, max 1000 characters)"
+    )
+
+
+class AddTasksArgs(BaseModel):
+    titles: List[str] = Field(
+        ..., description="Titles of the tasks to create (max 200 characters each, up to 100 tasks)"
+    )
+
+
+class ListTasksArgs(BaseModel):
+    status: TaskStatus = Field(default="all", description="Filter tasks by status (default: all)")
+
+
+class FindTasksArgs(BaseModel):
+    query: str = Field(
+        ..., description='Words from the task\'s title or description (e.g. "laundry")'
+    )
+    status: TaskStatus = Field(default="all", description="Filter tasks by status (default: all)")
+    limit: int = Field(default=5, description="Maximum number of matches (default 5, max 20)")
+
+
+class CompleteTaskArgs(BaseModel):
+    task_id: int = Field(..., description="ID of the task to complete")
+
+
+class DeleteTaskArgs(BaseModel):
+    task_id: int = Field(..., description="ID of the task to delete")
+
+
+class UpdateTaskArgs(BaseModel):
+    task_id: int = Field(..., description="ID of the task to update")
+    title: Optional[str] = Field(default=None, description="New task title (optional)")
+    description: Optional[str] = Field(default=None, description="New task description (optional)")
+
+
+class CompleteTasksArgs(BaseModel):
+    task_ids: List[int] = Field(..., description="IDs of the tasks to complete (up to 100)")
+
+
+class DeleteTasksArgs(BaseModel):
+    task_ids: List[int] = Field(..., description="IDs of the tasks to delete (up to 100)")
+
+
+# ============ Tool Responses ============
+
+
+class TaskInfo(BaseModel):
+    """Information about a task."""
+    id: int
+    title: str
+    description: Optional[str]
+    completed: bool
+    created_at: str
+
+
+class ToolResponse(BaseModel):
+    """Standard response format for all tools."""
+    success: bool
+    message: Optional[str] = None
+    error: Optional[str] = None
+
+
+class AddTaskResponse(ToolResponse):
+    """Response from add_task tool."""
+    task_id: Optional[int] = None
+    title: Optional[str] = None
+
+
+class ListTasksResponse(ToolResponse):
+    """Response from list_tasks tool."""
+    count: Optional[int] = None
+    tasks: Optional[List[TaskInfo]] = None
+
+
+class TaskMatch(BaseModel):
+    """A candidate task returned by find_tasks."""
+    id: int
+    title: str
+    completed: bool
+
+
+class FindTasksResponse(ToolResponse):
+    """Response from find_tasks tool."""
+    count: Optional[int] = None
+    tasks: Optional[List[TaskMatch]] = None
+
+
+class CompleteTaskResponse(ToolResponse):
+    """Response from complete_task tool."""
+    task_id: Optional[int] = None
+    title: Optional[str] = None
+    completed: Optional[bool] = None
+
+
+class DeleteTaskResponse(ToolResponse):
+    """Response from delete_task tool."""
+    task_id: Optional[int] = None
+
+
+class UpdateTaskResponse(ToolResponse):
+    """Response from update_task tool."""
+    task_id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+
+
+class TaskSummary(BaseModel):
+    """ID and title of a task changed by a batch tool."""
+    task_id: int
+    title: str
+
+
+class BatchTasksResponse(ToolResponse):
+    """Response from the add_tasks, complete_tasks and delete_tasks tools."""
+    count: Optional[int] = None
+    tasks: Optional[List[TaskSummary]] = None
+    # Requested IDs that don't exist or belong to another user
+    not_found: Optional[List[int]] = None
@@ -1,163 +1,125 @@
-"""MCP server initialization and tool registration."""
-
-from typing import List, Dict, Any, Callable
-
-# Tool registry
-_tools: Dict[str, Callable] = {}
-
-
-def register_tool(name: str, func: Callable) -> None:
-    """Register a tool function."""
-    _tools[name] = func
-
-
-def get_tool(name: str) -> Callable:
-    """Get a registered tool function."""
-    if name not in _tools:
-        raise ValueError(f"Tool '{name}' not found")
-    return _tools[name]
-
-
-def get_all_tools() -> Dict[str, Callable]:
-    """Get all registered tools."""
-    return _tools.copy()
-
-
-def get_mcp_tools() -> List[Dict[str, Any]]:
-    """
-    Get tool definitions for OpenAI Agent.
-    
-    Returns a list of tool definitions in OpenAI function calling format.
-    """
-    from .tools import add_task, list_tasks, complete_task, delete_task, update_task
-    
-    # Register all tools
-    register_tool("add_task", add_task)
-    register_tool("list_tasks", list_tasks)
-    register_tool("complete_task", complete_task)
-    register_tool("delete_task", delete_task)
-    register_tool("update_task", update_task)
-    
-    # Define tools in OpenAI function calling format
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "add_task",
-                "description": "Create a new task for the user",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "user_id": {
-                            "type": "string",
-                            "description": "User identifier from JWT token"
-                        },
-                        "title": {
-                            "type": "string",
-                            "description": "Task title (max 200 characters)"
-                        },
-                        "description": {
-                            "type": "string",
-                            "description": "Task description (optional, max 1000 characters)"
-                        }
-                    },
-                    "required": ["user_id", "title"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "list_tasks",
-                "description": "Retrieve user's tasks with optional filtering",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "user_id": {
-                            "type": "string",
-                            "description": "User identifier from JWT token"
-                        },
-                        "status": {
-                            "type": "string",
-                            "enum": ["all", "pending", "completed"],
-                            "description": "Filter tasks by status (default: all)"
-                        }
-                    },
-                    "required": ["user_id"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "complete_task",
-                "description": "Mark a task as completed",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "user_id": {
-                            "type": "string",
-                            "description": "User identifier from JWT token"
-                        },
-                        "task_id": {
-                            "type": "integer",
-                            "description": "ID of the task to complete"
-                        }
-                    },
-                    "required": ["user_id", "task_id"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "delete_task",
-                "description": "Delete a task permanently",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "user_id": {
-                            "type": "string",
-                            "description": "User identifier from JWT token"
-                        },
-                        "task_id": {
-                            "type": "integer",
-                            "description": "ID of the task to delete"
-                        }
-                    },
-                    "required": ["user_id", "task_id"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "update_task",
-                "description": "Update task title and/or description",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "user_id": {
-                            "type": "string",
-                            "description": "User identifier from JWT token"
-                        },
-                        "task_id": {
-                            "type": "integer",
-                            "description": "ID of the task to update"
-                        },
-                        "title": {
-                            "type": "string",
-                            "description": "New task title (optional)"
-                        },
-                        "description": {
-                            "type": "string",
-                            "description": "New task description (optional)"
-                        }
-                    },
-                    "required": ["user_id", "task_id"]
-                }
-            }
-        }
-    ]
-    
-    return tools
+"""MCP server initialization and tool registration."""
+
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable, Type
+from pydantic import BaseModel, ValidationError
+
+
+@dataclass(frozen=True)
+class RegisteredTool:
+    """A tool function with its argument model and function calling definition."""
+    name: str
+    func: Callable
+    args_model: Type[BaseModel]
+    definition: Dict[str, Any]
+
+
+# Tool registry, filled once when the tools module is imported
+_tools: Dict[str, RegisteredTool] = {}
+# Definitions in OpenAI function calling format, in registration order
+_definitions: List[Dict[str, Any]] = []
+_loaded = False
+
+
+def _parameters_schema(args_model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    JSON schema for a tool's arguments, in the plain form function calling
+    expects: pydantic's titles and defaults dropped, Optional[X] as X.
+    """
+    schema = args_model.model_json_schema()
+    properties = {}
+    for name, prop in schema["properties"].items():
+        prop = {key: value for key, value in prop.items() if key not in ("title", "default")}
+        options = [option for option in prop.pop("anyOf", []) if option.get("type") != "null"]
+        if len(options) == 1:
+            prop.update(options[0])
+        properties[name] = prop
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": schema.get("required", []),
+    }
+
+
+def register_tool(name: str, func: Callable, description: str, args_model: Type[BaseModel]) -> None:
+    """Register a tool function and build its definition."""
+    definition = {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": _parameters_schema(args_model),
+        },
+    }
+    _tools[name] = RegisteredTool(name, func, args_model, definition)
+    _definitions.append(definition)
+
+
+def tool(name: str, description: str, args_model: Type[BaseModel]) -> Callable[[Callable], Callable]:
+    """Decorator registering a tool function under `name`."""
+    def decorator(func: Callable) -> Callable:
+        register_tool(name, func, description, args_model)
+        return func
+    return decorator
+
+
+def _load_tools() -> None:
+    global _loaded
+    if not _loaded:
+        from . import tools  # noqa: F401 - registers the tools
+        _loaded = True
+
+
+def get_tool(name: str) -> Callable:
+    """Get a registered tool function."""
+    _load_tools()
+    if name not in _tools:
+        raise ValueError(f"Tool '{name}' not found")
+    return _tools[name].func
+
+
+def get_all_tools() -> Dict[str, Callable]:
+    """Get all registered tools."""
+    _load_tools()
+    return {name: registered.func for name, registered in _tools.items()}
+
+
+def get_mcp_tools() -> List[Dict[str, Any]]:
+    """
+    Get tool definitions for OpenAI Agent.
+
+    Returns a list of tool definitions in OpenAI function calling format.
+    The list is built once and shared; callers must not modify it.
+    """
+    _load_tools()
+    return _definitions
+
+
+async def call_tool(name: str, arguments: str, user_id: str) -> Dict[str, Any]:
+    """
+    Validate the model's JSON arguments for a tool and run it for `user_id`.
+
+    Unknown tools and invalid arguments are reported back as a failed tool
+    result, so the model can correct itself.
+    """
+    _load_tools()
+    registered = _tools.get(name)
+    if registered is None:
+        return {
+            "success": False,
+            "error": f"Tool '{name}' not found"
+        }
+
+    try:
+        args = registered.args_model.model_validate_json(arguments or "{}")
+    except ValidationError as e:
+        return {
+            "success": False,
+            "error": "Invalid arguments: " + "; ".join(
+                f"{'.'.join(str(part) for part in error['loc']) or 'arguments'}: {error['msg']}"
+                for error in e.errors()
+            )
+        }
+
+    # user_id comes from the JWT, never from the model (security)
+    return await registered.func(user_id=user_id, **args.model_dump(exclude_unset=True))
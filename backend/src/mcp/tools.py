@@ -1,289 +1,581 @@
-"""MCP tool implementations for task management."""
-
-from typing import Optional, Dict, Any
-from sqlmodel import Session, select
-from datetime import datetime, timezone
-
-from ..database import engine
-from ..models import Task
-
-
-def add_task(user_id: str, title: str, description: Optional[str] = None) -> Dict[str, Any]:
-    """
-    Create a new task for the user.
-    
-    Args:
-        user_id: User identifier from JWT token
-        title: Task title (required, max 200 chars)
-        description: Task description (optional, max 1000 chars)
-    
-    Returns:
-        Dictionary with success status, task_id, title, and message
-    """
-    # Validate inputs
-    if not title or not title.strip():
-        return {
-            "success": False,
-            "error": "Task title cannot be empty"
-        }
-    
-    if len(title) > 200:
-        return {
-            "success": False,
-            "error": "Task title must be 200 characters or less"
-        }
-    
-    if description and len(description) > 1000:
-        return {
-            "success": False,
-            "error": "Task description must be 1000 characters or less"
-        }
-    
-    try:
-        with Session(engine) as session:
-            # Create new task
-            new_task = Task(
-                user_id=user_id,
-                title=title.strip(),
-                description=description.strip() if description else None
-            )
-            
-            session.add(new_task)
-            session.commit()
-            session.refresh(new_task)
-            
-            return {
-                "success": True,
-                "task_id": new_task.id,
-                "title": new_task.title,
-                "message": f"Task '{new_task.title}' created successfully"
-            }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Failed to create task: {str(e)}"
-        }
-
-
-def list_tasks(user_id: str, status: str = "all") -> Dict[str, Any]:
-    """
-    Retrieve user's tasks with optional filtering.
-    
-    Args:
-        user_id: User identifier from JWT token
-        status: Filter by status ("all", "pending", "completed")
-    
-    Returns:
-        Dictionary with success status, count, and list of tasks
-    """
-    try:
-        with Session(engine) as session:
-            # Build query filtered by user_id
-            query = select(Task).where(Task.user_id == user_id)
-            
-            # Apply status filter
-            if status == "completed":
-                query = query.where(Task.completed == True)
-            elif status == "pending":
-                query = query.where(Task.completed == False)
-            # "all" - no additional filter
-            
-            # Order by created_at desc
-            query = query.order_by(Task.created_at.desc())
-            
-            tasks = session.exec(query).all()
-            
-            # Format tasks
-            task_list = [
-                {
-                    "id": task.id,
-                    "title": task.title,
-                    "description": task.description,
-                    "completed": task.completed,
-                    "created_at": task.created_at.isoformat()
-                }
-                for task in tasks
-            ]
-            
-            return {
-                "success": True,
-                "count": len(task_list),
-                "tasks": task_list
-            }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Failed to retrieve tasks: {str(e)}"
-        }
-
-
-def complete_task(user_id: str, task_id: int) -> Dict[str, Any]:
-    """
-    Mark a task as completed.
-    
-    Args:
-        user_id: User identifier from JWT token
-        task_id: ID of task to complete
-    
-    Returns:
-        Dictionary with success status, task_id, completed status, and message
-    """
-    try:
-        with Session(engine) as session:
-            # Find task by id AND user_id (security)
-            task = session.exec(
-                select(Task).where(Task.id == task_id, Task.user_id == user_id)
-            ).first()
-            
-            if not task:
-                return {
-                    "success": False,
-                    "error": f"Task {task_id} not found"
-                }
-            
-            # Mark as completed (idempotent)
-            task.completed = True
-            task.updated_at = datetime.now(timezone.utc)
-            
-            session.add(task)
-            session.commit()
-            session.refresh(task)
-            
-            return {
-                "success": True,
-                "task_id": task.id,
-                "title": task.title,
-                "completed": task.completed,
-                "message": f"Task '{task.title}' marked as completed"
-            }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Failed to complete task: {str(e)}"
-        }
-
-
-def delete_task(user_id: str, task_id: int) -> Dict[str, Any]:
-    """
-    Delete a task permanently.
-    
-    Args:
-        user_id: User identifier from JWT token
-        task_id: ID of task to delete
-    
-    Returns:
-        Dictionary with success status, task_id, and message
-    """
-    try:
-        with Session(engine) as session:
-            # Find task by id AND user_id (security)
-            task = session.exec(
-                select(Task).where(Task.id == task_id, Task.user_id == user_id)
-            ).first()
-            
-            if not task:
-                return {
-                    "success": False,
-                    "error": f"Task {task_id} not found"
-                }
-            
-            task_title = task.title
-            
-            # Delete task
-            session.delete(task)
-            session.commit()
-            
-            return {
-                "success": True,
-                "task_id": task_id,
-                "message": f"Task '{task_title}' deleted successfully"
-            }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Failed to delete task: {str(e)}"
-        }
-
-
-def update_task(
-    user_id: str, 
-    task_id: int, 
-    title: Optional[str] = None, 
-    description: Optional[str] = None
-) -> Dict[str, Any]:
-    """
-    Update task title and/or description.
-    
-    Args:
-        user_id: User identifier from JWT token
-        task_id: ID of task to update
-        title: New task title (optional)
-        description: New task description (optional)
-    
-    Returns:
-        Dictionary with success status, updated task info, and message
-    """
-    # Validate at least one field provided
-    if title is None and description is None:
-        return {
-            "success": False,
-            "error": "No fields provided to update"
-        }
-    
-    # Validate title if provided
-    if title is not None:
-        if not title.strip():
-            return {
-                "success": False,
-                "error": "Task title cannot be empty"
-            }
-        if len(title) > 200:
-            return {
-                "success": False,
-                "error": "Task title must be 200 characters or less"
-            }
-    
-    # Validate description if provided
-    if description is not None and len(description) > 1000:
-        return {
-            "success": False,
-            "error": "Task description must be 1000 characters or less"
-        }
-    
-    try:
-        with Session(engine) as session:
-            # Find task by id AND user_id (security)
-            task = session.exec(
-                select(Task).where(Task.id == task_id, Task.user_id == user_id)
-            ).first()
-            
-            if not task:
-                return {
-                    "success": False,
-                    "error": f"Task {task_id} not found"
-                }
-            
-            # Update fields
-            if title is not None:
-                task.title = title.strip()
-            if description is not None:
-                task.description = description.strip() if description.strip() else None
-            
-            task.updated_at = datetime.now(timezone.utc)
-            
-            session.add(task)
-            session.commit()
-            session.refresh(task)
-            
-            return {
-                "success": True,
-                "task_id": task.id,
-                "title": task.title,
-                "description": task.description,
-                "message": f"Task '{task.title}' updated successfully"
-            }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Failed to update task: {str(e)}"
-        }
+"""MCP tool implementations for task management."""
+
+from typing import Optional, Dict, Any, List
+from sqlalchemy import delete, insert, update
+from sqlmodel import select
+from datetime import datetime, timezone
+
+from ..cache import TASKS, bump_version, cached
+from ..database import async_session
+from ..events import task_deleted, task_event, task_events
+from ..models import Task
+from ..search import apply_task_search
+from ..sync import record_deleted_tasks
+from .schemas import (
+    AddTaskArgs, AddTasksArgs, ListTasksArgs, FindTasksArgs, CompleteTaskArgs,
+    DeleteTaskArgs, UpdateTaskArgs, CompleteTasksArgs, DeleteTasksArgs
+)
+from .server import tool
+
+
+@tool("add_task", "Create a new task for the user", AddTaskArgs)
+async def add_task(user_id: str, title: str, description: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Create a new task for the user.
+    
+    Args:
+        user_id: User identifier from JWT token
+        title: Task title (required, max 200 chars)
+        description: Task description (optional, max 1000 chars)
+    
+    Returns:
+        Dictionary with success status, task_id, title, and message
+    """
+    # Validate inputs
+    if not title or not title.strip():
+        return {
+            "success": False,
+            "error": "Task title cannot be empty"
+        }
+    
+    if len(title) > 200:
+        return {
+            "success": False,
+            "error": "Task title must be 200 characters or less"
+        }
+    
+    if description and len(description) > 1000:
+        return {
+            "success": False,
+            "error": "Task description must be 1000 characters or less"
+        }
+    
+    try:
+        async with async_session() as session:
+            # Create new task
+            new_task = Task(
+                user_id=user_id,
+                title=title.strip(),
+                description=description.strip() if description else None
+            )
+            
+            session.add(new_task)
+            await session.commit()
+            await bump_version(user_id, TASKS)
+            await session.refresh(new_task)
+            await task_events.publish(user_id, [task_event("created", new_task)])
+            
+            return {
+                "success": True,
+                "task_id": new_task.id,
+                "title": new_task.title,
+                "message": f"Task '{new_task.title}' created successfully"
+            }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to create task: {str(e)}"
+        }
+
+
+# Most tasks a single batch tool call may touch
+MAX_BATCH_SIZE = 100
+
+
+@tool("add_tasks", "Create several tasks at once. Use instead of repeated add_task calls", AddTasksArgs)
+async def add_tasks(user_id: str, titles: List[str]) -> Dict[str, Any]:
+    """
+    Create several tasks for the user in one transaction.
+    
+    Args:
+        user_id: User identifier from JWT token
+        titles: Task titles (each required, max 200 chars)
+    
+    Returns:
+        Dictionary with success status, count, created tasks, and message
+    """
+    if not titles:
+        return {
+            "success": False,
+            "error": "No task titles provided"
+        }
+    
+    if len(titles) > MAX_BATCH_SIZE:
+        return {
+            "success": False,
+            "error": f"At most {MAX_BATCH_SIZE} tasks can be created at once"
+        }
+    
+    # Validate every title before creating any
+    for title in titles:
+        if not title or not title.strip():
+            return {
+                "success": False,
+                "error": "Task title cannot be empty"
+            }
+        if len(title) > 200:
+            return {
+                "success": False,
+                "error": "Task title must be 200 characters or less"
+            }
+    
+    try:
+        async with async_session() as session:
+            now = datetime.now(timezone.utc)
+            
+            # One multi-row INSERT ... RETURNING, rows back in input order
+            created = (await session.exec(
+                insert(Task).returning(Task, sort_by_parameter_order=True),
+                params=[
+                    {
+                        "user_id": user_id,
+                        "title": title.strip(),
+                        "description": None,
+                        "completed": False,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for title in titles
+                ]
+            )).scalars().all()
+            await session.commit()
+            await bump_version(user_id, TASKS)
+            await task_events.publish(user_id, [task_event("created", task) for task in created])
+            
+            return {
+                "success": True,
+                "count": len(created),
+                "tasks": [{"task_id": task.id, "title": task.title} for task in created],
+                "message": f"Created {len(created)} tasks: "
+                + ", ".join(f"'{task.title}'" for task in created)
+            }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to create tasks: {str(e)}"
+        }
+
+
+@tool("list_tasks", "Retrieve user's tasks with optional filtering", ListTasksArgs)
+async def list_tasks(user_id: str, status: str = "all") -> Dict[str, Any]:
+    """
+    Retrieve user's tasks with optional filtering.
+    
+    Args:
+        user_id: User identifier from JWT token
+        status: Filter by status ("all", "pending", "completed")
+    
+    Returns:
+        Dictionary with success status, count, and list of tasks
+    """
+    async def load() -> Dict[str, Any]:
+        async with async_session() as session:
+            # Build query filtered by user_id
+            query = select(Task).where(Task.user_id == user_id)
+            
+            # Apply status filter
+            if status == "completed":
+                query = query.where(Task.completed == True)
+            elif status == "pending":
+                query = query.where(Task.completed == False)
+            # "all" - no additional filter
+            
+            # Order by created_at desc
+            query = query.order_by(Task.created_at.desc())
+            
+            tasks = (await session.exec(query)).all()
+            
+            # Format tasks
+            task_list = [
+                {
+                    "id": task.id,
+                    "title": task.title,
+                    "description": task.description,
+                    "completed": task.completed,
+                    "created_at": task.created_at.isoformat()
+                }
+                for task in tasks
+            ]
+            
+            return {
+                "success": True,
+                "count": len(task_list),
+                "tasks": task_list
+            }
+    
+    try:
+        # The agent often lists several times per turn; repeats come from the cache
+        return await cached(user_id, TASKS, "list_tasks", {"status": status}, load)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to retrieve tasks: {str(e)}"
+        }
+
+
+# Most candidates find_tasks returns
+MAX_FIND_RESULTS = 20
+
+
+@tool("find_tasks", "Find the IDs of the user's tasks matching a description, best match first", FindTasksArgs)
+async def find_tasks(user_id: str, query: str, status: str = "all", limit: int = 5) -> Dict[str, Any]:
+    """
+    Find the user's tasks best matching a description, to resolve task IDs.
+    
+    Uses the full-text search index: tasks matching every word first; if
+    none do, tasks matching any word. Only ids, titles and completion status
+    are returned, best match first.
+    
+    Args:
+        user_id: User identifier from JWT token
+        query: Words describing the task (e.g. "laundry")
+        status: Filter by status ("all", "pending", "completed")
+        limit: Maximum number of candidates (default 5, max 20)
+    
+    Returns:
+        Dictionary with success status, count, and list of candidate tasks
+    """
+    if not query or not query.strip():
+        return {
+            "success": False,
+            "error": "Search query cannot be empty"
+        }
+    
+    limit = max(1, min(limit, MAX_FIND_RESULTS))
+    
+    try:
+        async with async_session() as session:
+            base = select(Task.id, Task.title, Task.completed).where(Task.user_id == user_id)
+            if status == "completed":
+                base = base.where(Task.completed == True)
+            elif status == "pending":
+                base = base.where(Task.completed == False)
+            
+            rows = []
+            for match_all in (True, False):
+                search_query, rank = apply_task_search(
+                    base, query, session.bind.dialect.name, match_all=match_all
+                )
+                if rank is not None:
+                    search_query = search_query.order_by(rank.desc(), Task.id.desc())
+                else:
+                    search_query = search_query.order_by(Task.id.desc())
+                rows = (await session.exec(search_query.limit(limit))).all()
+                if rows:
+                    break
+            
+            return {
+                "success": True,
+                "count": len(rows),
+                "tasks": [
+                    {"id": task_id, "title": title, "completed": completed}
+                    for task_id, title, completed in rows
+                ]
+            }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to find tasks: {str(e)}"
+        }
+
+
+@tool("complete_task", "Mark a task as completed", CompleteTaskArgs)
+async def complete_task(user_id: str, task_id: int) -> Dict[str, Any]:
+    """
+    Mark a task as completed.
+    
+    Args:
+        user_id: User identifier from JWT token
+        task_id: ID of task to complete
+    
+    Returns:
+        Dictionary with success status, task_id, completed status, and message
+    """
+    try:
+        async with async_session() as session:
+            # Mark as completed (idempotent); matching user_id too (security)
+            task = (await session.exec(
+                update(Task)
+                .where(Task.id == task_id, Task.user_id == user_id)
+                .values(completed=True, updated_at=datetime.now(timezone.utc))
+                .returning(Task)
+            )).scalars().first()
+            
+            if not task:
+                return {
+                    "success": False,
+                    "error": f"Task {task_id} not found"
+                }
+            
+            await session.commit()
+            await bump_version(user_id, TASKS)
+            await task_events.publish(user_id, [task_event("updated", task)])
+            
+            return {
+                "success": True,
+                "task_id": task.id,
+                "title": task.title,
+                "completed": task.completed,
+                "message": f"Task '{task.title}' marked as completed"
+            }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to complete task: {str(e)}"
+        }
+
+
+@tool("delete_task", "Delete a task permanently", DeleteTaskArgs)
+async def delete_task(user_id: str, task_id: int) -> Dict[str, Any]:
+    """
+    Delete a task permanently.
+    
+    Args:
+        user_id: User identifier from JWT token
+        task_id: ID of task to delete
+    
+    Returns:
+        Dictionary with success status, task_id, and message
+    """
+    try:
+        async with async_session() as session:
+            # Delete task, matching user_id too (security)
+            task_title = (await session.exec(
+                delete(Task)
+                .where(Task.id == task_id, Task.user_id == user_id)
+                .returning(Task.title)
+            )).scalars().first()
+            
+            if task_title is None:
+                return {
+                    "success": False,
+                    "error": f"Task {task_id} not found"
+                }
+            
+            await record_deleted_tasks(session, user_id, [task_id])
+            await session.commit()
+            await bump_version(user_id, TASKS)
+            await task_events.publish(user_id, [task_deleted(task_id)])
+            
+            return {
+                "success": True,
+                "task_id": task_id,
+                "message": f"Task '{task_title}' deleted successfully"
+            }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to delete task: {str(e)}"
+        }
+
+
+@tool("update_task", "Update task title and/or description", UpdateTaskArgs)
+async def update_task(
+    user_id: str, 
+    task_id: int, 
+    title: Optional[str] = None, 
+    description: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Update task title and/or description.
+    
+    Args:
+        user_id: User identifier from JWT token
+        task_id: ID of task to update
+        title: New task title (optional)
+        description: New task description (optional)
+    
+    Returns:
+        Dictionary with success status, updated task info, and message
+    """
+    # Validate at least one field provided
+    if title is None and description is None:
+        return {
+            "success": False,
+            "error": "No fields provided to update"
+        }
+    
+    # Validate title if provided
+    if title is not None:
+        if not title.strip():
+            return {
+                "success": False,
+                "error": "Task title cannot be empty"
+            }
+        if len(title) > 200:
+            return {
+                "success": False,
+                "error": "Task title must be 200 characters or less"
+            }
+    
+    # Validate description if provided
+    if description is not None and len(description) > 1000:
+        return {
+            "success": False,
+            "error": "Task description must be 1000 characters or less"
+        }
+    
+    try:
+        async with async_session() as session:
+            # Update fields
+            values: Dict[str, Any] = {"updated_at": datetime.now(timezone.utc)}
+            if title is not None:
+                values["title"] = title.strip()
+            if description is not None:
+                values["description"] = description.strip() if description.strip() else None
+            
+            # Matching user_id too (security)
+            task = (await session.exec(
+                update(Task)
+                .where(Task.id == task_id, Task.user_id == user_id)
+                .values(**values)
+                .returning(Task)
+            )).scalars().first()
+            
+            if not task:
+                return {
+                    "success": False,
+                    "error": f"Task {task_id} not found"
+                }
+            
+            await session.commit()
+            await bump_version(user_id, TASKS)
+            await task_events.publish(user_id, [task_event("updated", task)])
+            
+            return {
+                "success": True,
+                "task_id": task.id,
+                "title": task.title,
+                "description": task.description,
+                "message": f"Task '{task.title}' updated successfully"
+            }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to update task: {str(e)}"
+        }
+
+
+def _batch_ids(task_ids: List[int]) -> Optional[Dict[str, Any]]:
+    """Validation error for a batch of task IDs, or None if it is usable."""
+    if not task_ids:
+        return {
+            "success": False,
+            "error": "No task IDs provided"
+        }
+    if len(task_ids) > MAX_BATCH_SIZE:
+        return {
+            "success": False,
+            "error": f"At most {MAX_BATCH_SIZE} tasks can be changed at once"
+        }
+    return None
+
+
+def _batch_result(task_ids: List[int], rows: List[Any], action: str) -> Dict[str, Any]:
+    """Report which of the requested tasks a batch tool changed."""
+    titles = {task_id: title for task_id, title in rows}
+    # In the order requested, without repeats
+    requested = list(dict.fromkeys(task_ids))
+    found = [task_id for task_id in requested if task_id in titles]
+    not_found = [task_id for task_id in requested if task_id not in titles]
+    
+    if not found:
+        return {
+            "success": False,
+            "error": f"Tasks not found: {not_found}"
+        }
+    
+    message = f"{len(found)} tasks {action}: " + ", ".join(f"'{titles[task_id]}'" for task_id in found)
+    if not_found:
+        message += f". Not found: {not_found}"
+    
+    return {
+        "success": True,
+        "count": len(found),
+        "tasks": [{"task_id": task_id, "title": titles[task_id]} for task_id in found],
+        "not_found": not_found,
+        "message": message
+    }
+
+
+@tool(
+    "complete_tasks",
+    "Mark several tasks as completed at once. Use instead of repeated complete_task calls",
+    CompleteTasksArgs
+)
+async def complete_tasks(user_id: str, task_ids: List[int]) -> Dict[str, Any]:
+    """
+    Mark several tasks as completed in one transaction.
+    
+    Args:
+        user_id: User identifier from JWT token
+        task_ids: IDs of tasks to complete
+    
+    Returns:
+        Dictionary with success status, completed tasks, IDs not found, and message
+    """
+    error = _batch_ids(task_ids)
+    if error:
+        return error
+    
+    try:
+        async with async_session() as session:
+            # One UPDATE ... WHERE id IN (...), matching user_id too (security)
+            completed = (await session.exec(
+                update(Task)
+                .where(Task.id.in_(task_ids), Task.user_id == user_id)
+                .values(completed=True, updated_at=datetime.now(timezone.utc))
+                .returning(Task)
+            )).scalars().all()
+            await session.commit()
+            await bump_version(user_id, TASKS)
+            await task_events.publish(user_id, [task_event("updated", task) for task in completed])
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to complete tasks: {str(e)}"
+        }
+    
+    return _batch_result(task_ids, [(task.id, task.title) for task in completed], "marked as completed")
+
+
+@tool(
+    "delete_tasks",
+    "Delete several tasks permanently at once. Use instead of repeated delete_task calls",
+    DeleteTasksArgs
+)
+async def delete_tasks(user_id: str, task_ids: List[int]) -> Dict[str, Any]:
+    """
+    Delete several tasks permanently in one transaction.
+    
+    Args:
+        user_id: User identifier from JWT token
+        task_ids: IDs of tasks to delete
+    
+    Returns:
+        Dictionary with success status, deleted tasks, IDs not found, and message
+    """
+    error = _batch_ids(task_ids)
+    if error:
+        return error
+    
+    try:
+        async with async_session() as session:
+            # One DELETE ... WHERE id IN (...), matching user_id too (security)
+            deleted = (await session.exec(
+                delete(Task)
+                .where(Task.id.in_(task_ids), Task.user_id == user_id)
+                .returning(Task.id, Task.title)
+            )).all()
+            await record_deleted_tasks(session, user_id, [task_id for task_id, _ in deleted])
+            await session.commit()
+            await bump_version(user_id, TASKS)
+            await task_events.publish(user_id, [task_deleted(task_id) for task_id, _ in deleted])
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to delete tasks: {str(e)}"
+        }
+    
+    return _batch_result(task_ids, deleted, "deleted")
+
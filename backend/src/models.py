@@ -1,58 +1,146 @@
-from datetime import datetime, timezone
-from typing import Optional, List
-from sqlmodel import Field, SQLModel, Relationship
-import uuid
-
-
-class User(SQLModel, table=True):
-    __tablename__ = "users"
-    
-    id: str = Field(primary_key=True)
-    email: Optional[str] = Field(default=None, unique=True, index=True)
-    username: Optional[str] = Field(default=None)
-    password_hash: Optional[str] = Field(default=None)
-    created_at: Optional[datetime] = Field(default_factory=lambda: datetime.now(timezone.utc))
-    
-    tasks: List["Task"] = Relationship(back_populates="user")
-
-
-class Task(SQLModel, table=True):
-    __tablename__ = "tasks"
-    
-    id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: str = Field(foreign_key="users.id", index=True)
-    title: str = Field(index=True)
-    description: Optional[str] = Field(default=None)
-    completed: bool = Field(default=False)
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    
-    user: Optional[User] = Relationship(back_populates="tasks")
-
-
-class Conversation(SQLModel, table=True):
-    """Stores chat conversations between user and AI assistant."""
-    __tablename__ = "conversations"
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
-    user_id: str = Field(index=True)
-    title: Optional[str] = Field(default=None, max_length=200)
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    
-    # Relationship
-    messages: List["Message"] = Relationship(back_populates="conversation", cascade_delete=True)
-
-
-class Message(SQLModel, table=True):
-    """Stores individual messages within conversations."""
-    __tablename__ = "messages"
-    
-    id: Optional[int] = Field(default=None, primary_key=True)
-    conversation_id: str = Field(foreign_key="conversations.id", index=True)
-    role: str = Field()  # "user" or "assistant"
-    content: str = Field()
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    
-    # Relationship
-    conversation: Optional[Conversation] = Relationship(back_populates="messages")
+from datetime import datetime, timezone
+from typing import Optional, List
+from sqlalchemy import DateTime, Index, text
+from sqlmodel import Field, SQLModel, Relationship
+import uuid
+
+
+# Full-text search document for a task (Postgres), title weighted above description.
+# Queries must use this exact expression for the GIN index to apply.
+TASK_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+# SQLite (local development) has no tsvector: an FTS5 index kept in sync by triggers.
+# Migration 0003 creates both from these definitions.
+SQLITE_TASK_FTS_DDL = [
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+    "title, description, content='tasks', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+    "END",
+    "CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "END",
+    "CREATE TRIGGER tasks_fts_au AFTER UPDATE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+    "END",
+]
+
+
+class User(SQLModel, table=True):
+    __tablename__ = "users"
+    
+    id: str = Field(primary_key=True)
+    email: Optional[str] = Field(default=None, unique=True, index=True)
+    username: Optional[str] = Field(default=None)
+    password_hash: Optional[str] = Field(default=None)
+    created_at: Optional[datetime] = Field(
+        default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True)
+    )
+    
+    tasks: List["Task"] = Relationship(back_populates="user")
+
+
+class Task(SQLModel, table=True):
+    __tablename__ = "tasks"
+    # Composite indexes matching the list queries: filter by user_id
+    # (+ completed), ordered by a column with id as the tiebreak
+    __table_args__ = (
+        Index("ix_tasks_user_created", "user_id", "created_at", "id"),
+        Index("ix_tasks_user_completed_created", "user_id", "completed", "created_at", "id"),
+        Index("ix_tasks_user_completed", "user_id", "completed", "id"),
+        Index("ix_tasks_user_updated", "user_id", "updated_at", "id"),
+        Index("ix_tasks_user_title", "user_id", "title", "id"),
+        Index(
+            "ix_tasks_search", text(f"({TASK_SEARCH_VECTOR})"), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: str = Field(foreign_key="users.id")
+    title: str = Field()
+    description: Optional[str] = Field(default=None)
+    completed: bool = Field(default=False)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True)
+    )
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True)
+    )
+    
+    user: Optional[User] = Relationship(back_populates="tasks")
+
+
+class Conversation(SQLModel, table=True):
+    """Stores chat conversations between user and AI assistant."""
+    __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_user_updated", "user_id", "updated_at", "id"),
+    )
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    user_id: str = Field()
+    title: Optional[str] = Field(default=None, max_length=200)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True)
+    )
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True)
+    )
+    # Running summary of the turns that no longer fit in the agent's history
+    # window, covering messages up to and including summarized_through (an id)
+    summary: Optional[str] = Field(default=None)
+    summarized_through: Optional[int] = Field(default=None)
+    
+    # Relationship
+    messages: List["Message"] = Relationship(back_populates="conversation", cascade_delete=True)
+
+
+class Message(SQLModel, table=True):
+    """Stores individual messages within conversations."""
+    __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conversation_created", "conversation_id", "created_at", "id"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    conversation_id: str = Field(foreign_key="conversations.id")
+    role: str = Field()  # "user" or "assistant"
+    content: str = Field()
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True)
+    )
+    
+    # Relationship
+    conversation: Optional[Conversation] = Relationship(back_populates="messages")
+
+
+class DeletedTask(SQLModel, table=True):
+    """Tombstone of a deleted task, so delta sync can report the deletion."""
+    __tablename__ = "deleted_tasks"
+    __table_args__ = (
+        Index("ix_deleted_tasks_user_deleted", "user_id", "deleted_at", "id"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    task_id: int = Field()
+    user_id: str = Field()
+    deleted_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True)
+    )
+
+
+class RevokedToken(SQLModel, table=True):
+    """JWT ids revoked before their expiry (logout, refresh token rotation)."""
+    __tablename__ = "revoked_tokens"
+    
+    jti: str = Field(primary_key=True)
+    user_id: str = Field()
+    # Unix timestamps, as in the token claims; rows can be purged after expires_at
+    expires_at: int = Field(index=True)
+    revoked_at: float = Field(index=True)
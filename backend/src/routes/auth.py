@@ -1,121 +1,236 @@
-import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-
-from ..database import get_session
-from ..models import User
-from ..schemas import UserCreate, UserLogin, UserResponse, Token, UserUpdate
-from ..auth import hash_password, verify_password, create_access_token, get_current_user
-
-router = APIRouter(prefix="/api/auth", tags=["Authentication"])
-
-
-@router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def signup(user_data: UserCreate, session: Session = Depends(get_session)):
-    """Register a new user."""
-    # Check if email already exists
-    existing_user = session.exec(
-        select(User).where(User.email == user_data.email)
-    ).first()
-    
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Create new user
-    new_user = User(
-        id=str(uuid.uuid4()),
-        email=user_data.email,
-        username=user_data.username,
-        password_hash=hash_password(user_data.password)
-    )
-    
-    session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
-    
-    return new_user
-
-
-@router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, session: Session = Depends(get_session)):
-    """Authenticate user and return access token."""
-    # Find user by email
-    user = session.exec(
-        select(User).where(User.email == credentials.email)
-    ).first()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password"
-        )
-    
-    # Verify password
-    if not verify_password(credentials.password, user.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password"
-        )
-    
-    # Create access token
-    access_token = create_access_token(user_id=user.id)
-    
-    return Token(access_token=access_token)
-
-
-@router.get("/me", response_model=UserResponse)
-async def get_current_user_info(
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user)
-):
-    """Get current authenticated user's information."""
-    user = session.get(User, user_id)
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    return user
-
-
-@router.patch("/me", response_model=UserResponse)
-async def update_current_user_info(
-    user_data: UserUpdate,
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user)
-):
-    """Update current authenticated user's information."""
-    user = session.get(User, user_id)
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # Update fields if provided
-    if user_data.username is not None:
-        user.username = user_data.username
-        
-    if user_data.email is not None and user_data.email != user.email:
-        # Check if new email is already taken
-        existing_email = session.exec(
-            select(User).where(User.email == user_data.email)
-        ).first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-        user.email = user_data.email
-        
-    session.add(user)
-    session.commit()
-    session.refresh(user)
-    
-    return user
+import time
+import uuid
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..database import get_session
+from ..models import RevokedToken, User
+from ..schemas import (
+    UserCreate, UserLogin, UserResponse, Token, UserUpdate, RefreshRequest, LogoutRequest
+)
+from ..auth import (
+    hash_password_async, verify_password_async, password_needs_rehash,
+    create_access_token, create_refresh_token, decode_token, get_current_user,
+    revoked_tokens, security, ACCESS_TOKEN_EXPIRE_MINUTES
+)
+
+router = APIRouter(prefix="/api/auth", tags=["Authentication"])
+
+
+def _issue_tokens(user_id: str) -> Token:
+    return Token(
+        access_token=create_access_token(user_id=user_id),
+        refresh_token=create_refresh_token(user_id=user_id),
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+
+
+async def _revoke(session: AsyncSession, claims: Dict[str, Any]) -> bool:
+    """
+    Revoke a token in this worker now and record it for the others.
+    
+    Commits on its own, so one token's revocation never rides on another's.
+    Returns False if the token was already recorded as revoked.
+    """
+    jti = claims.get("jti")
+    if jti is None:
+        return True
+    revoked_tokens.add(jti, float(claims["exp"]))
+    session.add(RevokedToken(
+        jti=jti,
+        user_id=claims["sub"],
+        expires_at=int(claims["exp"]),
+        revoked_at=time.time(),
+    ))
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        return False
+    return True
+
+
+@router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def signup(user_data: UserCreate, session: AsyncSession = Depends(get_session)):
+    """Register a new user."""
+    email_taken = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Email already registered"
+    )
+    
+    # Check if email already exists
+    existing_user = (await session.exec(
+        select(User).where(User.email == user_data.email)
+    )).first()
+    
+    if existing_user:
+        raise email_taken
+    
+    # Release the connection while the password is hashed
+    await session.commit()
+    
+    # Create new user
+    new_user = User(
+        id=str(uuid.uuid4()),
+        email=user_data.email,
+        username=user_data.username,
+        password_hash=await hash_password_async(user_data.password)
+    )
+    
+    session.add(new_user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # A concurrent signup took the email while the password was hashed
+        await session.rollback()
+        raise email_taken
+    await session.refresh(new_user)
+    
+    return new_user
+
+
+@router.post("/login", response_model=Token)
+async def login(credentials: UserLogin, session: AsyncSession = Depends(get_session)):
+    """Authenticate user and return access token."""
+    # Find user by email
+    user = (await session.exec(
+        select(User).where(User.email == credentials.email)
+    )).first()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
+    
+    # End the read transaction so the connection goes back to the pool
+    # while bcrypt runs
+    await session.commit()
+    
+    # Verify password
+    if not await verify_password_async(credentials.password, user.password_hash):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
+    
+    # Upgrade the stored hash if the bcrypt work factor has changed
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(credentials.password)
+        session.add(user)
+        await session.commit()
+    
+    return _issue_tokens(user.id)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, session: AsyncSession = Depends(get_session)):
+    """Exchange a refresh token for a new access token and refresh token."""
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    claims = decode_token(request.refresh_token, token_type="refresh")
+    if claims is None or claims.get("jti") is None:
+        raise invalid_token
+    
+    # Refreshes are rare, so check the database too, not just this worker's list
+    jti = claims["jti"]
+    if jti in revoked_tokens or await session.get(RevokedToken, jti) is not None:
+        raise invalid_token
+    
+    # Rotate: each refresh token works once. A concurrent reuse of the same
+    # token loses on the primary key.
+    if not await _revoke(session, claims):
+        raise invalid_token
+    
+    return _issue_tokens(claims["sub"])
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """Revoke the current access token and, if given, the session's refresh token."""
+    # Either may already be revoked by a concurrent logout or refresh; each
+    # is recorded separately, so that doesn't undo the other
+    claims = decode_token(credentials.credentials)
+    if claims is None:
+        # Accepted from the verified-token cache but no longer decodes
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await _revoke(session, claims)
+    
+    if request is not None and request.refresh_token:
+        refresh_claims = decode_token(request.refresh_token, token_type="refresh")
+        if refresh_claims is not None and refresh_claims["sub"] == user_id:
+            await _revoke(session, refresh_claims)
+    
+    return None
+
+
+@router.get("/me", response_model=UserResponse)
+async def get_current_user_info(
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """Get current authenticated user's information."""
+    user = await session.get(User, user_id)
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return user
+
+
+@router.patch("/me", response_model=UserResponse)
+async def update_current_user_info(
+    user_data: UserUpdate,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """Update current authenticated user's information."""
+    user = await session.get(User, user_id)
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    # Update fields if provided
+    if user_data.username is not None:
+        user.username = user_data.username
+        
+    if user_data.email is not None and user_data.email != user.email:
+        # Check if new email is already taken
+        existing_email = (await session.exec(
+            select(User).where(User.email == user_data.email)
+        )).first()
+        if existing_email:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+        user.email = user_data.email
+        
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    
+    return user
@@ -1,207 +1,542 @@
-"""Chat API endpoint for conversational task management."""
-
-from typing import Optional
-from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-
-from ..database import get_session
-from ..models import Conversation, Message
-from ..schemas import ChatRequest, ChatResponse
-from ..auth import get_current_user
-from ..agent.client import run_agent
-
-router = APIRouter(prefix="/api/chat", tags=["Chat"])
-
-
-@router.post("", response_model=ChatResponse)
-async def chat(
-    request: ChatRequest,
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user)
-):
-    """
-    Chat endpoint for conversational task management.
-    
-    Flow:
-    1. Get or create conversation
-    2. Fetch conversation history from database
-    3. Store user message
-    4. Run OpenAI agent with history and tools
-    5. Store assistant response
-    6. Return response and conversation_id
-    """
-    try:
-        # Step 1: Get or create conversation
-        if request.conversation_id:
-            # Verify conversation belongs to user (security)
-            conversation = session.exec(
-                select(Conversation).where(
-                    Conversation.id == request.conversation_id,
-                    Conversation.user_id == user_id
-                )
-            ).first()
-            
-            if not conversation:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Conversation not found"
-                )
-        else:
-            # Create new conversation
-            conversation = Conversation(user_id=user_id)
-            session.add(conversation)
-            session.commit()
-            session.refresh(conversation)
-        
-        # Step 2: Fetch conversation history (last 50 messages for context)
-        messages = session.exec(
-            select(Message)
-            .where(Message.conversation_id == conversation.id)
-            .order_by(Message.created_at.desc())
-            .limit(50)
-        ).all()
-        
-        # Reverse to chronological order
-        messages = list(reversed(messages))
-        
-        # Format history for agent
-        conversation_history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
-        
-        # Step 3: Store user message
-        user_message = Message(
-            conversation_id=conversation.id,
-            role="user",
-            content=request.message
-        )
-        session.add(user_message)
-        session.commit()
-        
-        # Step 4: Run agent
-        agent_response = run_agent(
-            user_id=user_id,
-            message=request.message,
-            conversation_history=conversation_history
-        )
-        
-        # Step 5: Store assistant response
-        assistant_message = Message(
-            conversation_id=conversation.id,
-            role="assistant",
-            content=agent_response
-        )
-        session.add(assistant_message)
-        
-        # Update conversation timestamp
-        conversation.updated_at = datetime.now(timezone.utc)
-        
-        # Auto-generate title from first message if not set
-        if not conversation.title and request.message:
-            # Use first 50 chars of first user message as title
-            conversation.title = request.message[:50] + ("..." if len(request.message) > 50 else "")
-        
-        session.add(conversation)
-        session.commit()
-        
-        # Step 6: Return response
-        return ChatResponse(
-            response=agent_response,
-            conversation_id=conversation.id
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Chat error: {str(e)}"
-        )
-
-
-@router.get("/conversations", response_model=list)
-async def list_conversations(
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user)
-):
-    """Get all conversations for the current user."""
-    conversations = session.exec(
-        select(Conversation)
-        .where(Conversation.user_id == user_id)
-        .order_by(Conversation.updated_at.desc())
-    ).all()
-    
-    return [
-        {
-            "id": conv.id,
-            "title": conv.title or "New Conversation",
-            "created_at": conv.created_at.isoformat(),
-            "updated_at": conv.updated_at.isoformat()
-        }
-        for conv in conversations
-    ]
-
-
-@router.get("/conversations/{conversation_id}/messages", response_model=list)
-async def get_conversation_messages(
-    conversation_id: str,
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user)
-):
-    """Get all messages for a conversation."""
-    # Verify conversation belongs to user
-    conversation = session.exec(
-        select(Conversation).where(
-            Conversation.id == conversation_id,
-            Conversation.user_id == user_id
-        )
-    ).first()
-    
-    if not conversation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Conversation not found"
-        )
-    
-    messages = session.exec(
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at.asc())
-    ).all()
-    
-    return [
-        {
-            "id": msg.id,
-            "role": msg.role,
-            "content": msg.content,
-            "created_at": msg.created_at.isoformat()
-        }
-        for msg in messages
-    ]
-
-
-@router.delete("/conversations/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_conversation(
-    conversation_id: str,
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user)
-):
-    """Delete a conversation and all its messages."""
-    conversation = session.exec(
-        select(Conversation).where(
-            Conversation.id == conversation_id,
-            Conversation.user_id == user_id
-        )
-    ).first()
-    
-    if not conversation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Conversation not found"
-        )
-    
-    session.delete(conversation)
-    session.commit()
-    return None
+"""Chat API endpoint for conversational task management."""
+
+import json
+import logging
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime, timezone
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.background import BackgroundTask
+
+from ..config import settings
+from ..database import get_session, async_session
+from ..models import Conversation, Message
+from ..schemas import ChatRequest, ChatResponse
+from ..auth import get_current_user
+from ..cache import CHAT, bump_version
+from ..cursors import InvalidCursor, cursor_value, decode_cursor, encode_cursor
+from ..etag import not_modified
+from ..events import sse_frame
+from ..history import SUMMARY_CONTEXT, estimate_tokens, select_history
+from ..intents import route_message
+
+router = APIRouter(prefix="/api/chat", tags=["Chat"])
+
+logger = logging.getLogger(__name__)
+
+# Most unsummarized messages loaded per turn; the token budget usually
+# cuts the window well before this
+MAX_HISTORY_MESSAGES = 50
+# Once the unsummarized messages overflow the history window (or fill
+# MAX_HISTORY_MESSAGES), all but the newest that fit in half the window, at
+# most half as many messages, are folded into the summary. The next
+# summary is then several turns away rather than due on every turn.
+SUMMARY_KEEP_MESSAGES = MAX_HISTORY_MESSAGES // 2
+# Messages per summarization call, and calls per background run; a longer
+# backlog is folded on later turns
+SUMMARY_BATCH_MESSAGES = 50
+MAX_SUMMARY_BATCHES = 4
+
+# Default and largest page sizes of the conversation and message listings
+CONVERSATIONS_PAGE_SIZE = 50
+MAX_CONVERSATIONS_PAGE_SIZE = 100
+MESSAGES_PAGE_SIZE = 50
+MAX_MESSAGES_PAGE_SIZE = 200
+# Messages fetched per round trip while streaming an export
+EXPORT_BATCH_SIZE = 200
+
+
+def _encode_cursor(timestamp: datetime, row_id: Any) -> str:
+    """Encode the position of a row in a newest-first listing as an opaque cursor."""
+    return encode_cursor({"v": timestamp.isoformat(), "id": row_id})
+
+
+def _decode_cursor(cursor: str, id_type: type) -> Tuple[datetime, Any]:
+    """
+    Decode a `before` cursor into (timestamp, row id); ids are uuid strings
+    for conversations (`id_type` str) and integers for messages (int).
+    """
+    try:
+        payload = decode_cursor(cursor)
+        return cursor_value(payload.get("v"), datetime), cursor_value(payload.get("id"), id_type)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+async def _get_own_conversation(session: AsyncSession, user_id: str, conversation_id: str) -> Conversation:
+    """The user's conversation, or 404 (also for other users' conversations)."""
+    conversation = (await session.exec(
+        select(Conversation).where(
+            Conversation.id == conversation_id,
+            Conversation.user_id == user_id
+        )
+    )).first()
+    
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
+        )
+    return conversation
+
+
+def _message_dict(msg: Message) -> Dict[str, Any]:
+    return {
+        "id": msg.id,
+        "role": msg.role,
+        "content": msg.content,
+        "created_at": msg.created_at.isoformat()
+    }
+
+
+async def _start_turn(
+    session: AsyncSession,
+    user_id: str,
+    request: ChatRequest
+) -> Tuple[Conversation, List[Dict[str, str]], Optional[int]]:
+    """
+    Get or create the conversation, load its history and store the user message.
+    
+    Returns the conversation, the history formatted for the agent (excluding
+    the new user message) and, when the history has outgrown its window, the
+    id of the newest message to fold into the summary (else None).
+    
+    The history is the conversation's running summary followed by the most
+    recent messages that fit in HISTORY_TOKEN_BUDGET, so the prompt stays
+    bounded however long the conversation runs.
+    """
+    if request.conversation_id:
+        # Verify conversation belongs to user (security)
+        conversation = await _get_own_conversation(session, user_id, request.conversation_id)
+    else:
+        # Create new conversation
+        conversation = Conversation(user_id=user_id)
+        session.add(conversation)
+        await session.commit()
+        await session.refresh(conversation)
+    
+    # Fetch the messages not yet covered by the summary, newest first
+    query = select(Message).where(Message.conversation_id == conversation.id)
+    if conversation.summarized_through is not None:
+        query = query.where(Message.id > conversation.summarized_through)
+    messages = (await session.exec(
+        query.order_by(Message.created_at.desc(), Message.id.desc()).limit(MAX_HISTORY_MESSAGES)
+    )).all()
+    
+    # Format history for agent: the summary, then as many recent messages as fit
+    conversation_history = []
+    budget = settings.history_token_budget
+    if conversation.summary:
+        summary = SUMMARY_CONTEXT + conversation.summary
+        conversation_history.append({"role": "system", "content": summary})
+        budget -= estimate_tokens(summary)
+    recent, older = select_history(messages, max(budget, 0))
+    conversation_history.extend(
+        {"role": msg.role, "content": msg.content}
+        for msg in recent
+    )
+    
+    fold_through = None
+    if older or len(messages) == MAX_HISTORY_MESSAGES:
+        kept, _ = select_history(messages[:SUMMARY_KEEP_MESSAGES], max(budget // 2, 0))
+        fold_through = messages[len(kept)].id
+    
+    # Store user message
+    user_message = Message(
+        conversation_id=conversation.id,
+        role="user",
+        content=request.message
+    )
+    session.add(user_message)
+    await session.commit()
+    await bump_version(user_id, CHAT)
+    
+    return conversation, conversation_history, fold_through
+
+
+async def _update_summary(
+    conversation_id: str,
+    previous_summary: Optional[str],
+    previous_through: Optional[int],
+    fold_through: int
+) -> None:
+    """
+    Fold the messages after `previous_through`, up to and including
+    `fold_through`, into the conversation summary.
+    
+    Messages are read back from the database in batches, so ones older than
+    the window loaded for the turn are folded in too, never skipped. Runs
+    after the response has been sent. On failure the summary is left as it
+    was and the same messages are folded in on a later turn.
+    """
+    from ..agent.client import summarize_history
+    
+    try:
+        summary, through = previous_summary, previous_through
+        for _ in range(MAX_SUMMARY_BATCHES):
+            # A short session per batch: no connection is held during the LLM call
+            query = select(Message).where(
+                Message.conversation_id == conversation_id,
+                Message.id <= fold_through
+            )
+            if through is not None:
+                query = query.where(Message.id > through)
+            async with async_session() as session:
+                batch = (await session.exec(
+                    query.order_by(Message.id).limit(SUMMARY_BATCH_MESSAGES)
+                )).all()
+            if not batch:
+                break
+            
+            folded = await summarize_history(
+                summary,
+                [{"role": msg.role, "content": msg.content} for msg in batch],
+                max_tokens=settings.history_summary_tokens
+            )
+            if not folded:
+                break
+            summary, through = folded, batch[-1].id
+            if len(batch) < SUMMARY_BATCH_MESSAGES:
+                break
+        
+        if through == previous_through:
+            return
+        
+        async with async_session() as session:
+            # Only advance: a concurrent turn may already have summarized further
+            column = Conversation.summarized_through
+            await session.exec(
+                update(Conversation)
+                .where(
+                    Conversation.id == conversation_id,
+                    column.is_(None) if previous_through is None else column == previous_through
+                )
+                .values(summary=summary, summarized_through=through)
+            )
+            await session.commit()
+    except Exception:
+        logger.exception("Failed to update summary of conversation %s", conversation_id)
+
+
+async def _finish_turn(
+    session: AsyncSession,
+    conversation: Conversation,
+    user_text: str,
+    agent_response: str
+) -> None:
+    """Store the assistant response and bump the conversation's timestamp/title."""
+    assistant_message = Message(
+        conversation_id=conversation.id,
+        role="assistant",
+        content=agent_response
+    )
+    session.add(assistant_message)
+    
+    # Update conversation timestamp
+    conversation.updated_at = datetime.now(timezone.utc)
+    
+    # Auto-generate title from first message if not set
+    if not conversation.title and user_text:
+        # Use first 50 chars of first user message as title
+        conversation.title = user_text[:50] + ("..." if len(user_text) > 50 else "")
+    
+    session.add(conversation)
+    await session.commit()
+    await bump_version(conversation.user_id, CHAT)
+
+
+@router.post("", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Chat endpoint for conversational task management.
+    
+    Flow:
+    1. Get or create conversation
+    2. Fetch conversation history from database
+    3. Store user message
+    4. Answer simple requests directly, otherwise run OpenAI agent with
+       history and tools
+    5. Store assistant response
+    6. Return response and conversation_id
+    
+    Turns that fell out of the history window are summarized after the
+    response is sent (not after fast path replies, which use no history).
+    """
+    try:
+        # Steps 1-3: Conversation, history and user message
+        conversation, conversation_history, fold_through = await _start_turn(session, user_id, request)
+        
+        # Step 4: Fast path for simple requests, else the agent (imported on
+        # first use to keep the LLM client off cold starts)
+        routed = await route_message(user_id, request.message) if settings.intent_router else None
+        if routed is not None:
+            agent_response = routed.response
+        else:
+            from ..agent.client import run_agent
+            agent_response = await run_agent(
+                user_id=user_id,
+                message=request.message,
+                conversation_history=conversation_history
+            )
+        
+        # Step 5: Store assistant response
+        await _finish_turn(session, conversation, request.message, agent_response)
+        
+        if fold_through is not None and routed is None:
+            background_tasks.add_task(
+                _update_summary, conversation.id, conversation.summary,
+                conversation.summarized_through, fold_through
+            )
+        
+        # Step 6: Return response
+        return ChatResponse(
+            response=agent_response,
+            conversation_id=conversation.id
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Chat error: {str(e)}"
+        )
+
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Streaming variant of the chat endpoint (Server-Sent Events).
+    
+    Emits `token`, `tool_call` and `tool_result` events while the agent runs,
+    then stores the assistant response and emits a final `done` event
+    carrying the full response and the conversation_id.
+    """
+    try:
+        conversation, conversation_history, fold_through = await _start_turn(session, user_id, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Chat error: {str(e)}"
+        )
+    
+    # The response outlives the request-scoped session; the final write uses its own
+    session.expunge(conversation)
+    
+    routed = await route_message(user_id, request.message) if settings.intent_router else None
+    
+    async def agent_events():
+        if routed is not None:
+            # Same events the agent would send, without the LLM
+            yield {"type": "tool_call", "name": routed.tool}
+            yield {"type": "tool_result", "name": routed.tool, "success": routed.success}
+            yield {"type": "token", "content": routed.response}
+            yield {"type": "final", "content": routed.response}
+            return
+        
+        from ..agent.client import stream_agent
+        async for event in stream_agent(
+            user_id=user_id,
+            message=request.message,
+            conversation_history=conversation_history
+        ):
+            yield event
+    
+    async def event_stream():
+        agent_response = ""
+        async for event in agent_events():
+            if event["type"] == "final":
+                agent_response = event["content"]
+            else:
+                yield sse_frame(event)
+        
+        try:
+            async with async_session() as write_session:
+                await _finish_turn(write_session, conversation, request.message, agent_response)
+        except Exception as e:
+            yield sse_frame({"type": "error", "detail": f"Chat error: {str(e)}"})
+            return
+        
+        yield sse_frame({
+            "type": "done",
+            "response": agent_response,
+            "conversation_id": conversation.id
+        })
+    
+    # Summarize turns that fell out of the history window once the stream
+    # ends; fast path replies use no history, so they leave it for a later turn
+    background = None
+    if fold_through is not None and routed is None:
+        background = BackgroundTask(
+            _update_summary, conversation.id, conversation.summary,
+            conversation.summarized_through, fold_through
+        )
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background
+    )
+
+
+@router.get("/conversations", response_model=list)
+async def list_conversations(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user),
+    limit: int = Query(CONVERSATIONS_PAGE_SIZE, ge=1, le=MAX_CONVERSATIONS_PAGE_SIZE),
+    before: Optional[str] = Query(None)
+):
+    """
+    Get the current user's conversations, most recently active first.
+    
+    Returns at most `limit`; when older ones follow, the cursor to pass as
+    `before` is returned in the X-Next-Cursor header. Conditional on the ETag.
+    """
+    unchanged = await not_modified(request, response, user_id, CHAT)
+    if unchanged:
+        return unchanged
+    
+    query = select(Conversation).where(Conversation.user_id == user_id)
+    if before:
+        updated_at, conversation_id = _decode_cursor(before, str)
+        query = query.where(
+            tuple_(Conversation.updated_at, Conversation.id) < tuple_(updated_at, conversation_id)
+        )
+    
+    # One extra row tells whether another page follows
+    conversations = (await session.exec(
+        query.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).limit(limit + 1)
+    )).all()
+    
+    if len(conversations) > limit:
+        conversations = conversations[:limit]
+        last = conversations[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor(last.updated_at, last.id)
+    
+    return [
+        {
+            "id": conv.id,
+            "title": conv.title or "New Conversation",
+            "created_at": conv.created_at.isoformat(),
+            "updated_at": conv.updated_at.isoformat()
+        }
+        for conv in conversations
+    ]
+
+
+@router.get("/conversations/{conversation_id}/messages", response_model=list)
+async def get_conversation_messages(
+    conversation_id: str,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user),
+    limit: int = Query(MESSAGES_PAGE_SIZE, ge=1, le=MAX_MESSAGES_PAGE_SIZE),
+    before: Optional[str] = Query(None)
+):
+    """
+    Get the latest messages of a conversation, in chronological order.
+    
+    Returns the newest `limit` messages (before the `before` cursor, if
+    given); when earlier ones exist, the cursor to fetch them is returned in
+    the X-Next-Cursor header. Conditional on the ETag.
+    """
+    unchanged = await not_modified(request, response, user_id, CHAT)
+    if unchanged:
+        return unchanged
+    
+    await _get_own_conversation(session, user_id, conversation_id)
+    
+    query = select(Message).where(Message.conversation_id == conversation_id)
+    if before:
+        created_at, message_id = _decode_cursor(before, int)
+        query = query.where(tuple_(Message.created_at, Message.id) < tuple_(created_at, message_id))
+    
+    # Newest first through the index, then flipped for display
+    messages = (await session.exec(
+        query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1)
+    )).all()
+    
+    if len(messages) > limit:
+        messages = messages[:limit]
+        oldest = messages[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor(oldest.created_at, oldest.id)
+    
+    return [_message_dict(msg) for msg in reversed(messages)]
+
+
+@router.get("/conversations/{conversation_id}/export")
+async def export_conversation(
+    conversation_id: str,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Download a whole conversation as NDJSON.
+    
+    The first line is the conversation, each following line one message in
+    chronological order. Messages are streamed from a server-side cursor, so
+    memory use doesn't grow with the conversation.
+    """
+    conversation = await _get_own_conversation(session, user_id, conversation_id)
+    
+    async def export_lines():
+        yield json.dumps({
+            "type": "conversation",
+            "id": conversation.id,
+            "title": conversation.title,
+            "created_at": conversation.created_at.isoformat(),
+            "updated_at": conversation.updated_at.isoformat()
+        }) + "\n"
+        
+        # The response outlives the request-scoped session
+        async with async_session() as export_session:
+            messages = await export_session.stream_scalars(
+                select(Message)
+                .where(Message.conversation_id == conversation_id)
+                .order_by(Message.created_at.asc(), Message.id.asc())
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            async for msg in messages:
+                yield json.dumps({"type": "message", **_message_dict(msg)}) + "\n"
+    
+    return StreamingResponse(
+        export_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="conversation-{conversation_id}.ndjson"'}
+    )
+
+
+@router.delete("/conversations/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_conversation(
+    conversation_id: str,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """Delete a conversation and all its messages."""
+    conversation = await _get_own_conversation(session, user_id, conversation_id)
+    
+    await session.delete(conversation)
+    await session.commit()
+    await bump_version(user_id, CHAT)
+    return None
@@ -1,145 +1,503 @@
-from typing import Optional, List
-from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlmodel import Session, select, or_, desc, asc
-
-from ..database import get_session
-from ..models import Task
-from ..schemas import TaskCreate, TaskUpdate, TaskResponse
-from ..auth import get_current_user
-
-router = APIRouter(prefix="/api/tasks", tags=["Tasks"])
-
-
-@router.get("", response_model=List[TaskResponse])
-async def get_tasks(
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user),
-    status_filter: Optional[str] = Query(None, alias="status"),
-    search: Optional[str] = Query(None),
-    sort_by: str = Query("created_at"),
-    order: str = Query("desc")
-):
-    """Get all tasks for the current user with filtering and sorting."""
-    query = select(Task).where(Task.user_id == user_id)
-    
-    # Apply status filter
-    if status_filter == "completed":
-        query = query.where(Task.completed == True)
-    elif status_filter == "active":
-        query = query.where(Task.completed == False)
-        
-    # Apply search filter
-    if search:
-        search_filter = f"%{search}%"
-        query = query.where(
-            or_(
-                Task.title.ilike(search_filter),
-                Task.description.ilike(search_filter)
-            )
-        )
-        
-    # Apply sorting
-    sort_column = getattr(Task, sort_by, Task.created_at)
-    if order.lower() == "asc":
-        query = query.order_by(asc(sort_column))
-    else:
-        query = query.order_by(desc(sort_column))
-        
-    tasks = session.exec(query).all()
-    return tasks
-
-
-@router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-async def create_task(
-    task_data: TaskCreate,
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user)
-):
-    """Create a new task for the current user."""
-    new_task = Task(
-        user_id=user_id,
-        title=task_data.title,
-        description=task_data.description
-    )
-    
-    session.add(new_task)
-    session.commit()
-    session.refresh(new_task)
-    
-    return new_task
-
-
-@router.get("/{task_id}", response_model=TaskResponse)
-async def get_task(
-    task_id: int,
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user)
-):
-    """Get a specific task by ID."""
-    task = session.exec(
-        select(Task).where(Task.id == task_id, Task.user_id == user_id)
-    ).first()
-    
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    return task
-
-
-@router.patch("/{task_id}", response_model=TaskResponse)
-async def update_task(
-    task_id: int,
-    task_data: TaskUpdate,
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user)
-):
-    """Update a task. Can only update own tasks."""
-    task = session.exec(
-        select(Task).where(Task.id == task_id, Task.user_id == user_id)
-    ).first()
-    
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    # Update fields if provided
-    update_data = task_data.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(task, key, value)
-    
-    task.updated_at = datetime.now(timezone.utc)
-    
-    session.add(task)
-    session.commit()
-    session.refresh(task)
-    
-    return task
-
-
-@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_task(
-    task_id: int,
-    session: Session = Depends(get_session),
-    user_id: str = Depends(get_current_user)
-):
-    """Delete a task. Can only delete own tasks."""
-    task = session.exec(
-        select(Task).where(Task.id == task_id, Task.user_id == user_id)
-    ).first()
-    
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-    
-    session.delete(task)
-    session.commit()
-    
-    return None
+import asyncio
+from collections import Counter
+from typing import Optional, List, Tuple, Any, Dict
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, func, insert, tuple_, update
+from sqlmodel import select, desc, asc
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..database import get_session
+from ..models import Task
+from ..schemas import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskChangesResponse, TaskStatsResponse,
+    BulkTaskRequest, BulkTaskResult, BulkTaskResponse
+)
+from ..auth import get_current_user
+from ..cache import TASKS, bump_version, cached
+from ..cursors import InvalidCursor, cursor_value, decode_cursor, encode_cursor
+from ..etag import not_modified
+from ..events import sse_frame, task_deleted, task_event, task_events
+from ..search import apply_task_search
+from ..sync import record_deleted_tasks, task_changes
+
+router = APIRouter(prefix="/api/tasks", tags=["Tasks"])
+
+
+# Columns tasks can be sorted by; pagination breaks ties on id
+SORT_COLUMNS = {
+    "created_at": Task.created_at,
+    "updated_at": Task.updated_at,
+    "title": Task.title,
+    "completed": Task.completed,
+}
+# Type of each sort column's value, as read back from a cursor
+SORT_VALUE_TYPES = {"created_at": datetime, "updated_at": datetime, "title": str, "completed": bool}
+# Default and largest number of tasks per page
+TASKS_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Default and largest number of changed tasks (and of deletions) per delta sync
+CHANGES_PAGE_SIZE = 500
+MAX_CHANGES_PAGE_SIZE = 1000
+# Seconds between keep-alive comments on an idle task change stream
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+def _encode_cursor(sort_by: str, order: str, task: Task) -> str:
+    """Encode the position after `task` as an opaque cursor string."""
+    value = getattr(task, sort_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return encode_cursor({"s": sort_by, "o": order, "v": value, "id": task.id})
+
+
+def _decode_cursor(cursor: str, sort_by: str, order: str) -> Tuple[Any, int]:
+    """Decode a cursor into (sort value, task id), checking it matches the query."""
+    try:
+        payload = decode_cursor(cursor)
+        if payload.get("s") != sort_by or payload.get("o") != order:
+            raise InvalidCursor("Invalid cursor")
+        value = cursor_value(payload.get("v"), SORT_VALUE_TYPES[sort_by])
+        return value, cursor_value(payload.get("id"), int)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _filter_tasks(user_id: str, status_filter: Optional[str]):
+    """Select the user's tasks, narrowed to the `status` filter."""
+    query = select(Task).where(Task.user_id == user_id)
+    if status_filter == "completed":
+        query = query.where(Task.completed == True)
+    elif status_filter == "active":
+        query = query.where(Task.completed == False)
+    return query
+
+
+def _order_tasks(
+    query, status_filter: Optional[str], sort_by: str, order: str, cursor: Optional[str]
+):
+    """
+    Order `query` by a column of SORT_COLUMNS (`order` is "asc" or "desc"),
+    starting after the cursor's position; returns the query and the sort key used.
+    """
+    if sort_by not in SORT_COLUMNS:
+        sort_by = "created_at"
+    sort_column = SORT_COLUMNS[sort_by]
+    
+    # Keyset pagination: continue strictly after the cursor's (value, id)
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort_by, order)
+        key, position = tuple_(sort_column, Task.id), tuple_(value, last_id)
+        if sort_by == "completed" and status_filter in ("completed", "active"):
+            # completed is fixed by the filter, so only ids are compared (a
+            # row comparison here makes SQLite sort the index range again)
+            if value != (status_filter == "completed"):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+            key, position = Task.id, last_id
+        if order == "asc":
+            query = query.where(key > position)
+        else:
+            query = query.where(key < position)
+    
+    if order == "asc":
+        return query.order_by(asc(sort_column), asc(Task.id)), sort_by
+    return query.order_by(desc(sort_column), desc(Task.id)), sort_by
+
+
+async def _query_tasks(
+    session: AsyncSession,
+    user_id: str,
+    status_filter: Optional[str],
+    search: Optional[str],
+    sort_by: str,
+    order: str,
+    limit: int,
+    cursor: Optional[str]
+) -> Tuple[List[Task], Optional[str]]:
+    """Run a task listing query; returns the tasks and the next page's cursor."""
+    query = _filter_tasks(user_id, status_filter)
+    
+    # Apply search filter
+    rank = None
+    if search:
+        query, rank = apply_task_search(query, search, session.bind.dialect.name)
+    
+    order = "asc" if order.lower() == "asc" else "desc"
+    
+    # Relevance ordering returns the best `limit` matches, without further pages
+    if sort_by == "relevance" and rank is not None:
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not supported when sorting by relevance"
+            )
+        query = query.order_by(desc(rank), desc(Task.id)).limit(limit)
+        return (await session.exec(query)).all(), None
+    
+    query, sort_by = _order_tasks(query, status_filter, sort_by, order, cursor)
+    
+    # Fetch one extra row to know whether another page follows
+    tasks = (await session.exec(query.limit(limit + 1))).all()
+    
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        return tasks, _encode_cursor(sort_by, order, tasks[-1])
+    
+    return tasks, None
+
+
+@router.get("", response_model=List[TaskResponse])
+async def get_tasks(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    search: Optional[str] = Query(None),
+    sort_by: str = Query("created_at"),
+    order: str = Query("desc"),
+    limit: int = Query(TASKS_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None)
+):
+    """
+    Get tasks for the current user with filtering and sorting.
+    
+    Results come in pages of `limit` tasks (50 by default); when more tasks
+    follow, the cursor for the next page is returned in the X-Next-Cursor
+    header.
+    `search` uses the full-text index; combine it with sort_by=relevance to
+    get the best matches first.
+    
+    Responses carry an ETag; a request whose If-None-Match is still current
+    gets 304 without touching the database. Other repeated requests are
+    served from the task list cache until the user's next write.
+    """
+    unchanged = await not_modified(request, response, user_id, TASKS)
+    if unchanged:
+        return unchanged
+    
+    async def load() -> Dict[str, Any]:
+        tasks, next_cursor = await _query_tasks(
+            session, user_id, status_filter, search, sort_by, order, limit, cursor
+        )
+        return {
+            "tasks": [TaskResponse.model_validate(task).model_dump(mode="json") for task in tasks],
+            "next_cursor": next_cursor,
+        }
+    
+    page = await cached(
+        user_id, TASKS, "get_tasks",
+        {
+            "status": status_filter, "search": search, "sort_by": sort_by,
+            "order": order, "limit": limit, "cursor": cursor,
+        },
+        load
+    )
+    
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    
+    return page["tasks"]
+
+
+def _stats_query(user_id: str):
+    """(completed, count) rows of the user's tasks."""
+    return select(Task.completed, func.count()).where(Task.user_id == user_id).group_by(Task.completed)
+
+
+@router.get("/stats", response_model=TaskStatsResponse)
+async def get_task_stats(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Total, completed and pending task counts of the current user.
+    
+    Lists come in pages, so clients show these rather than counting what
+    they have loaded. Counted from the (user_id, completed, id) index.
+    """
+    unchanged = await not_modified(request, response, user_id, TASKS)
+    if unchanged:
+        return unchanged
+    
+    async def load() -> Dict[str, int]:
+        counts = dict((await session.exec(_stats_query(user_id))).all())
+        completed, pending = counts.get(True, 0), counts.get(False, 0)
+        return {"total": completed + pending, "completed": completed, "pending": pending}
+    
+    return await cached(user_id, TASKS, "get_task_stats", {}, load)
+
+
+@router.get("/changes", response_model=TaskChangesResponse)
+async def get_task_changes(
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user),
+    since: Optional[str] = Query(None),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=MAX_CHANGES_PAGE_SIZE)
+):
+    """
+    Tasks created, updated or deleted since a previous sync.
+    
+    Without `since`, returns every task (a full sync). Each response has a
+    `cursor` to pass as `since` next time; while `has_more` is set, request
+    again straight away. Deleted tasks are listed by id in `deleted`.
+    """
+    try:
+        return await task_changes(session, user_id, since, limit)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.get("/stream")
+async def stream_task_changes(
+    request: Request,
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Live feed of the current user's task changes (Server-Sent Events).
+    
+    Emits `ready` once subscribed, then `task_created` and `task_updated`
+    (carrying the task) and `task_deleted` (carrying its id) for every write,
+    whether made through the API or by the chat agent. A `resync` event means
+    changes were missed and the list should be refetched. Idle streams get a
+    keep-alive comment every STREAM_KEEPALIVE_SECONDS.
+    """
+    async def event_stream():
+        async with task_events.subscribe(user_id) as queue:
+            yield sse_frame({"type": "ready"})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield sse_frame(event)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
+async def create_task(
+    task_data: TaskCreate,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """Create a new task for the current user."""
+    new_task = Task(
+        user_id=user_id,
+        title=task_data.title,
+        description=task_data.description
+    )
+    
+    session.add(new_task)
+    await session.commit()
+    await bump_version(user_id, TASKS)
+    await session.refresh(new_task)
+    await task_events.publish(user_id, [task_event("created", new_task)])
+    
+    return new_task
+
+
+@router.post("/bulk", response_model=BulkTaskResponse)
+async def bulk_tasks(
+    request: BulkTaskRequest,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Apply a batch of create/update/complete/delete operations in one transaction.
+    
+    Each kind of operation is a single statement: a multi-row INSERT for the
+    creates, UPDATE/DELETE ... WHERE id IN (...) for the rest (updates
+    setting different fields get one UPDATE per distinct change). Results are
+    returned in request order; an operation on a missing task gets a 404
+    result and the others still apply. A task id may appear only once.
+    """
+    operations = request.operations
+    
+    repeated = sorted(
+        task_id for task_id, count in Counter(
+            op.id for op in operations if op.op != "create"
+        ).items() if count > 1
+    )
+    if repeated:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tasks appear in more than one operation: {repeated}"
+        )
+    
+    now = datetime.now(timezone.utc)
+    results: List[Optional[BulkTaskResult]] = [None] * len(operations)
+    
+    def task_result(index: int, task: Optional[Task], success_status: int) -> BulkTaskResult:
+        op = operations[index]
+        if task is None:
+            return BulkTaskResult(op=op.op, status=404, id=op.id, detail="Task not found")
+        return BulkTaskResult(op=op.op, status=success_status, id=task.id, task=task)
+    
+    creates = [i for i, op in enumerate(operations) if op.op == "create"]
+    if creates:
+        created = (await session.exec(
+            insert(Task).returning(Task, sort_by_parameter_order=True),
+            params=[
+                {
+                    "user_id": user_id,
+                    "title": operations[i].title,
+                    "description": operations[i].description,
+                    "completed": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in creates
+            ]
+        )).scalars().all()
+        for i, task in zip(creates, created):
+            results[i] = task_result(i, task, status.HTTP_201_CREATED)
+    
+    # Group updates and completes by the fields they set
+    changes: Dict[Tuple[Tuple[str, Any], ...], List[int]] = {}
+    for i, op in enumerate(operations):
+        if op.op == "update":
+            values = op.model_dump(exclude_unset=True, exclude={"op", "id"})
+        elif op.op == "complete":
+            values = {"completed": op.completed}
+        else:
+            continue
+        changes.setdefault(tuple(sorted(values.items())), []).append(i)
+    
+    for values, indices in changes.items():
+        updated = {
+            task.id: task
+            for task in (await session.exec(
+                update(Task)
+                .where(Task.user_id == user_id, Task.id.in_([operations[i].id for i in indices]))
+                .values(**dict(values), updated_at=now)
+                .returning(Task)
+            )).scalars().all()
+        }
+        for i in indices:
+            results[i] = task_result(i, updated.get(operations[i].id), status.HTTP_200_OK)
+    
+    deletes = [i for i, op in enumerate(operations) if op.op == "delete"]
+    if deletes:
+        deleted = set((await session.exec(
+            delete(Task)
+            .where(Task.user_id == user_id, Task.id.in_([operations[i].id for i in deletes]))
+            .returning(Task.id)
+        )).scalars().all())
+        await record_deleted_tasks(session, user_id, sorted(deleted), now)
+        for i in deletes:
+            task_id = operations[i].id
+            if task_id in deleted:
+                results[i] = BulkTaskResult(op="delete", status=status.HTTP_204_NO_CONTENT, id=task_id)
+            else:
+                results[i] = task_result(i, None, status.HTTP_204_NO_CONTENT)
+    
+    await session.commit()
+    await bump_version(user_id, TASKS)
+    
+    events = []
+    for result in results:
+        if result.status == status.HTTP_201_CREATED:
+            events.append(task_event("created", result.task))
+        elif result.status == status.HTTP_200_OK:
+            events.append(task_event("updated", result.task))
+        elif result.status == status.HTTP_204_NO_CONTENT:
+            events.append(task_deleted(result.id))
+    await task_events.publish(user_id, events)
+    
+    return BulkTaskResponse(results=results)
+
+
+@router.get("/{task_id}", response_model=TaskResponse)
+async def get_task(
+    task_id: int,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """Get a specific task by ID."""
+    task = (await session.exec(
+        select(Task).where(Task.id == task_id, Task.user_id == user_id)
+    )).first()
+    
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    
+    return task
+
+
+@router.patch("/{task_id}", response_model=TaskResponse)
+async def update_task(
+    task_id: int,
+    task_data: TaskUpdate,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """Update a task. Can only update own tasks."""
+    # One UPDATE ... RETURNING: the ownership check is part of the WHERE clause
+    task = (await session.exec(
+        update(Task)
+        .where(Task.id == task_id, Task.user_id == user_id)
+        .values(**task_data.model_dump(exclude_unset=True), updated_at=datetime.now(timezone.utc))
+        .returning(Task)
+    )).scalars().first()
+    
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    
+    await session.commit()
+    await bump_version(user_id, TASKS)
+    await task_events.publish(user_id, [task_event("updated", task)])
+    
+    return task
+
+
+@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_task(
+    task_id: int,
+    session: AsyncSession = Depends(get_session),
+    user_id: str = Depends(get_current_user)
+):
+    """Delete a task. Can only delete own tasks."""
+    deleted_id = (await session.exec(
+        delete(Task)
+        .where(Task.id == task_id, Task.user_id == user_id)
+        .returning(Task.id)
+    )).scalars().first()
+    
+    if deleted_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    
+    await record_deleted_tasks(session, user_id, [deleted_id])
+    await session.commit()
+    await bump_version(user_id, TASKS)
+    await task_events.publish(user_id, [task_deleted(task_id)])
+    
+    return None
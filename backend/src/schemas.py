@@ -1,81 +1,178 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
-from datetime import datetime
-
-
-# ============ Auth Schemas ============
-
-class UserCreate(BaseModel):
-    email: str = Field(..., min_length=5, max_length=255)
-    username: str = Field(..., min_length=2, max_length=100)
-    password: str = Field(..., min_length=6, max_length=100)
-
-
-class UserUpdate(BaseModel):
-    email: Optional[str] = Field(None, min_length=5, max_length=255)
-    username: Optional[str] = Field(None, min_length=2, max_length=100)
-
-
-class UserLogin(BaseModel):
-    email: str
-    password: str
-
-
-class UserResponse(BaseModel):
-    id: str
-    email: str
-    username: str
-    created_at: Optional[datetime] = None
-
-    class Config:
-        from_attributes = True
-
-
-class Token(BaseModel):
-    access_token: str
-    token_type: str = "bearer"
-
-
-class TokenData(BaseModel):
-    user_id: str
-
-
-# ============ Task Schemas ============
-
-class TaskCreate(BaseModel):
-    title: str = Field(..., min_length=1, max_length=200)
-    description: Optional[str] = Field(default=None, max_length=1000)
-
-
-class TaskUpdate(BaseModel):
-    title: Optional[str] = Field(default=None, min_length=1, max_length=200)
-    description: Optional[str] = Field(default=None, max_length=1000)
-    completed: Optional[bool] = None
-
-
-class TaskResponse(BaseModel):
-    id: int
-    user_id: str
-    title: str
-    description: Optional[str]
-    completed: bool
-    created_at: datetime
-    updated_at: datetime
-
-
-    class Config:
-        from_attributes = True
-
-
-# ============== Chat Schemas ==============
-
-class ChatRequest(BaseModel):
-    """Request schema for chat endpoint."""
-    message: str = Field(..., min_length=1, max_length=5000)
-    conversation_id: Optional[str] = None
-
-
-class ChatResponse(BaseModel):
-    """Response schema for chat endpoint."""
-    response: str
-    conversation_id: str
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Annotated, List, Literal, Optional, Union
+from datetime import datetime
+
+
+# ============ Auth Schemas ============
+
+class UserCreate(BaseModel):
+    email: str = Field(..., min_length=5, max_length=255)
+    username: str = Field(..., min_length=2, max_length=100)
+    password: str = Field(..., min_length=6, max_length=100)
+
+
+class UserUpdate(BaseModel):
+    email: Optional[str] = Field(None, min_length=5, max_length=255)
+    username: Optional[str] = Field(None, min_length=2, max_length=100)
+
+
+class UserLogin(BaseModel):
+    email: str
+    password: str
+
+
+class UserResponse(BaseModel):
+    id: str
+    email: str
+    username: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+    # Access token lifetime in seconds
+    expires_in: Optional[int] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
+class TokenData(BaseModel):
+    user_id: str
+
+
+# ============ Task Schemas ============
+
+class TaskCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=200)
+    description: Optional[str] = Field(default=None, max_length=1000)
+
+
+def _not_null(value):
+    # Omitted fields keep their default without validation, so this only
+    # sees an explicit null, which the NOT NULL column can't store
+    if value is None:
+        raise ValueError("may be omitted but not null")
+    return value
+
+
+class TaskUpdate(BaseModel):
+    title: Optional[str] = Field(default=None, min_length=1, max_length=200)
+    description: Optional[str] = Field(default=None, max_length=1000)
+    completed: Optional[bool] = None
+    
+    _not_null = field_validator("title", "completed")(_not_null)
+
+
+class TaskResponse(BaseModel):
+    id: int
+    user_id: str
+    title: str
+    description: Optional[str]
+    completed: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+    class Config:
+        from_attributes = True
+
+
+# Upper bound on operations in one POST /api/tasks/bulk request
+MAX_BULK_OPERATIONS = 500
+
+
+class BulkCreateOperation(BaseModel):
+    op: Literal["create"]
+    title: str = Field(..., min_length=1, max_length=200)
+    description: Optional[str] = Field(default=None, max_length=1000)
+
+
+class BulkUpdateOperation(BaseModel):
+    op: Literal["update"]
+    id: int
+    title: Optional[str] = Field(default=None, min_length=1, max_length=200)
+    description: Optional[str] = Field(default=None, max_length=1000)
+    completed: Optional[bool] = None
+    
+    _not_null = field_validator("title", "completed")(_not_null)
+
+
+class BulkCompleteOperation(BaseModel):
+    op: Literal["complete"]
+    id: int
+    # false marks the task as not completed again
+    completed: bool = True
+
+
+class BulkDeleteOperation(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+BulkTaskOperation = Annotated[
+    Union[BulkCreateOperation, BulkUpdateOperation, BulkCompleteOperation, BulkDeleteOperation],
+    Field(discriminator="op"),
+]
+
+
+class BulkTaskRequest(BaseModel):
+    operations: List[BulkTaskOperation] = Field(..., min_length=1, max_length=MAX_BULK_OPERATIONS)
+
+
+class BulkTaskResult(BaseModel):
+    """Outcome of one operation, at the same position as in the request."""
+    op: str
+    # HTTP status the single-task endpoint would have returned
+    status: int
+    id: Optional[int] = None
+    task: Optional[TaskResponse] = None
+    detail: Optional[str] = None
+
+
+class BulkTaskResponse(BaseModel):
+    results: List[BulkTaskResult]
+
+
+class TaskStatsResponse(BaseModel):
+    """Counts over all of the user's tasks, regardless of list filters and paging."""
+    total: int
+    completed: int
+    pending: int
+
+
+class TaskChangesResponse(BaseModel):
+    """
+    Task changes after a sync cursor. Apply `deleted` before `changed`;
+    a task can be reported more than once across syncs, so apply by id.
+    """
+    changed: List[TaskResponse]
+    deleted: List[int]
+    # Pass as `since` on the next request
+    cursor: str
+    # More changes follow right away; request again with `cursor`
+    has_more: bool
+
+
+# ============== Chat Schemas ==============
+
+class ChatRequest(BaseModel):
+    """Request schema for chat endpoint."""
+    message: str = Field(..., min_length=1, max_length=5000)
+    conversation_id: Optional[str] = None
+
+
+class ChatResponse(BaseModel):
+    """Response schema for chat endpoint."""
+    response: str
+    conversation_id: str
@@ -0,0 +1,72 @@
+"""Full-text task search backed by the database's own search index."""
+
+import re
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import or_
+
+from .models import Task, TASK_SEARCH_VECTOR
+
+# SQLite FTS5 index over tasks (see SQLITE_TASK_FTS_DDL)
+_tasks_fts = table("tasks_fts", column("rowid"))
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _search_terms(search: str) -> list:
+    """Split free text into search words, dropping punctuation/operators."""
+    return _WORD.findall(search.lower())
+
+
+def apply_task_search(
+    query: Any, search: str, dialect_name: str, match_all: bool = True
+) -> Tuple[Any, Optional[ColumnElement]]:
+    """
+    Restrict a Task select to rows matching `search`.
+
+    Every word has to match the start of a word in the title or description
+    (so "buy mil" finds "Buy milk"); with match_all=False any one word is
+    enough. Returns the filtered query and a relevance expression (higher is
+    better) to order by.
+
+    Postgres uses the GIN-indexed tsvector, SQLite its FTS5 table; any other
+    database, or a search without words, falls back to an unranked
+    substring match (relevance None).
+    """
+    terms = _search_terms(search)
+
+    if terms and dialect_name == "postgresql":
+        ts_query = func.to_tsquery(
+            literal_column("'simple'"),
+            (" & " if match_all else " | ").join(f"{term}:*" for term in terms)
+        )
+        vector = literal_column(f"({TASK_SEARCH_VECTOR})")
+        query = query.where(vector.op("@@")(ts_query))
+        # Normalization 1 divides by log(document length): among equal
+        # matches, the shorter (more specific) task ranks first
+        return query, func.ts_rank(vector, ts_query, 1)
+
+    if terms and dialect_name == "sqlite":
+        match = (" " if match_all else " OR ").join(f'"{term}"*' for term in terms)
+        matches = (
+            select(
+                _tasks_fts.c.rowid,
+                # bm25 with title weighted above description; lower is more relevant
+                literal_column("bm25(tasks_fts, 2.0, 1.0)").label("rank")
+            )
+            .where(literal_column("tasks_fts").op("MATCH")(match))
+            .subquery()
+        )
+        query = query.join(matches, matches.c.rowid == Task.id)
+        return query, -matches.c.rank
+
+    patterns = [f"%{search}%"] if match_all or not terms else [f"%{term}%" for term in terms]
+    query = query.where(
+        or_(
+            *(Task.title.ilike(pattern) for pattern in patterns),
+            *(Task.description.ilike(pattern) for pattern in patterns)
+        )
+    )
+    return query, None
@@ -0,0 +1,114 @@
+"""
+Delta sync for tasks: what changed since a client's last sync.
+
+Changed rows come from tasks ordered by (updated_at, id), deletions from
+the deleted_tasks tombstones ordered by (deleted_at, id); both use a
+(user_id, time, id) index, so a sync costs what changed rather than the
+size of the list. The cursor keeps one position in each.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import exists, insert, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .cursors import InvalidCursor, cursor_value, decode_cursor, encode_cursor
+from .models import DeletedTask, Task
+
+# Timestamps are taken when a write starts, so a slow transaction (or a
+# worker with a clock behind) can commit rows older than a cursor handed out
+# meanwhile. A caught-up cursor therefore points this far back; the few
+# changes in that window are reported again on the next sync.
+SYNC_OVERLAP = timedelta(seconds=15)
+
+# A position in one of the two sources: (timestamp, row id), or None for
+# the beginning
+Position = Optional[Tuple[datetime, int]]
+
+
+def encode_sync_cursor(changed: Position, deleted: Position) -> str:
+    def position(value: Position) -> Optional[List[Any]]:
+        return None if value is None else [value[0].isoformat(), value[1]]
+
+    return encode_cursor({"c": position(changed), "d": position(deleted)})
+
+
+def decode_sync_cursor(cursor: str) -> Tuple[Position, Position]:
+    """Raises InvalidCursor for anything encode_sync_cursor did not produce."""
+    def position(value: Any) -> Position:
+        if value is None:
+            return None
+        if not isinstance(value, list) or len(value) != 2:
+            raise InvalidCursor("Invalid cursor")
+        return cursor_value(value[0], datetime), cursor_value(value[1], int)
+
+    payload = decode_cursor(cursor)
+    if "c" not in payload or "d" not in payload:
+        raise InvalidCursor("Invalid cursor")
+    return position(payload["c"]), position(payload["d"])
+
+
+async def record_deleted_tasks(
+    session: AsyncSession, user_id: str, task_ids: Sequence[int], deleted_at: Optional[datetime] = None
+) -> None:
+    """Write tombstones for deleted tasks, in the deleting transaction."""
+    if not task_ids:
+        return
+    deleted_at = deleted_at or datetime.now(timezone.utc)
+    await session.exec(
+        insert(DeletedTask),
+        params=[
+            {"task_id": task_id, "user_id": user_id, "deleted_at": deleted_at}
+            for task_id in task_ids
+        ]
+    )
+
+
+async def task_changes(
+    session: AsyncSession, user_id: str, since: Optional[str], limit: int
+) -> Dict[str, Any]:
+    """
+    Up to `limit` changed tasks and `limit` deletions after the `since`
+    cursor (everything live if None), with the cursor to continue from.
+    """
+    caught_up = datetime.now(timezone.utc) - SYNC_OVERLAP
+    if since is None:
+        # A full sync has no deletions to learn about before it started
+        changed_after, deleted_after = None, (caught_up, 0)
+    else:
+        changed_after, deleted_after = decode_sync_cursor(since)
+
+    query = select(Task).where(Task.user_id == user_id)
+    if changed_after is not None:
+        query = query.where(tuple_(Task.updated_at, Task.id) > tuple_(*changed_after))
+    changed = (await session.exec(
+        query.order_by(Task.updated_at, Task.id).limit(limit + 1)
+    )).all()
+
+    query = select(DeletedTask).where(
+        DeletedTask.user_id == user_id,
+        # A live task with the id was created since (SQLite reuses rowids)
+        ~exists().where(Task.id == DeletedTask.task_id, Task.user_id == user_id)
+    )
+    if deleted_after is not None:
+        query = query.where(tuple_(DeletedTask.deleted_at, DeletedTask.id) > tuple_(*deleted_after))
+    deleted = (await session.exec(
+        query.order_by(DeletedTask.deleted_at, DeletedTask.id).limit(limit + 1)
+    )).all()
+
+    def next_position(rows: Sequence[Any], column: str) -> Position:
+        if len(rows) > limit:
+            # Mid catch-up: continue right after the last row sent
+            last = rows[limit - 1]
+            return getattr(last, column), last.id
+        # Caught up: rewind to the start of the overlap window
+        return caught_up, 0
+
+    return {
+        "changed": changed[:limit],
+        "deleted": [tombstone.task_id for tombstone in deleted[:limit]],
+        "cursor": encode_sync_cursor(next_position(changed, "updated_at"), next_position(deleted, "deleted_at")),
+        "has_more": len(changed) > limit or len(deleted) > limit,
+    }
@@ -0,0 +1,41 @@
+"""
+Test setup: the app reads DATABASE_URL at import, so point it at a scratch
+SQLite database before anything imports `src`.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_db_dir = tempfile.mkdtemp(prefix="todo-tests-")
+atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+# Fast hashes; the work factor isn't under test
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def client():
+    """A TestClient for the app, over the scratch database migrated to head."""
+    from alembic import command
+    from alembic.config import Config
+    from fastapi.testclient import TestClient
+    from src.main import app
+    
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    """Authorization headers for a freshly signed-up user."""
+    user = {"email": "tester@example.com", "username": "tester", "password": "password123"}
+    assert client.post("/api/auth/signup", json=user).status_code == 201
+    response = client.post("/api/auth/login", json={"email": user["email"], "password": user["password"]})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
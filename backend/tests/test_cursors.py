@@ -0,0 +1,96 @@
+"""
+A forged cursor is a 400 on every paginated endpoint: task listing, delta
+sync and the chat listings all read their cursors through cursor_value.
+"""
+
+import pytest
+
+from src.cursors import encode_cursor
+
+TIMESTAMP = "2026-01-01T00:00:00+00:00"
+
+# Rejected where a row id (an integer) is expected
+BAD_IDS = {
+    "beyond int64": 10**27,
+    "float": 1.5,
+    "string": "1",
+    "bool": True,
+}
+# Rejected where a timestamp is expected
+BAD_TIMESTAMPS = {
+    "not iso 8601": "yesterday",
+    "before utc year 1": "0001-01-01T00:00:00+05:00",
+    "after utc year 9999": "9999-12-31T23:59:59-05:00",
+}
+
+
+@pytest.fixture(scope="module")
+def conversation_id(client, auth_headers):
+    # Answered by the fast path, so no LLM is needed
+    response = client.post("/api/chat", json={"message": "show my tasks"}, headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()["conversation_id"]
+
+
+def _tasks(client, auth_headers, timestamp, row_id):
+    cursor = encode_cursor({"s": "created_at", "o": "desc", "v": timestamp, "id": row_id})
+    return client.get("/api/tasks", params={"cursor": cursor}, headers=auth_headers)
+
+
+def _changes(client, auth_headers, timestamp, row_id):
+    cursor = encode_cursor({"c": [timestamp, row_id], "d": None})
+    return client.get("/api/tasks/changes", params={"since": cursor}, headers=auth_headers)
+
+
+def _messages(client, auth_headers, conversation_id, timestamp, row_id):
+    cursor = encode_cursor({"v": timestamp, "id": row_id})
+    return client.get(
+        f"/api/chat/conversations/{conversation_id}/messages", params={"before": cursor}, headers=auth_headers
+    )
+
+
+def _conversations(client, auth_headers, timestamp):
+    cursor = encode_cursor({"v": timestamp, "id": "conversation-id"})
+    return client.get("/api/chat/conversations", params={"before": cursor}, headers=auth_headers)
+
+
+def test_valid_cursors(client, auth_headers, conversation_id):
+    assert _tasks(client, auth_headers, TIMESTAMP, 1).status_code == 200
+    assert _changes(client, auth_headers, TIMESTAMP, 1).status_code == 200
+    assert _messages(client, auth_headers, conversation_id, TIMESTAMP, 1).status_code == 200
+    assert _conversations(client, auth_headers, TIMESTAMP).status_code == 200
+
+
+@pytest.mark.parametrize("row_id", BAD_IDS.values(), ids=BAD_IDS.keys())
+def test_tasks_cursor_rejects_id(client, auth_headers, row_id):
+    assert _tasks(client, auth_headers, TIMESTAMP, row_id).status_code == 400
+
+
+@pytest.mark.parametrize("timestamp", BAD_TIMESTAMPS.values(), ids=BAD_TIMESTAMPS.keys())
+def test_tasks_cursor_rejects_timestamp(client, auth_headers, timestamp):
+    assert _tasks(client, auth_headers, timestamp, 1).status_code == 400
+
+
+@pytest.mark.parametrize("row_id", BAD_IDS.values(), ids=BAD_IDS.keys())
+def test_sync_cursor_rejects_id(client, auth_headers, row_id):
+    assert _changes(client, auth_headers, TIMESTAMP, row_id).status_code == 400
+
+
+@pytest.mark.parametrize("timestamp", BAD_TIMESTAMPS.values(), ids=BAD_TIMESTAMPS.keys())
+def test_sync_cursor_rejects_timestamp(client, auth_headers, timestamp):
+    assert _changes(client, auth_headers, timestamp, 1).status_code == 400
+
+
+@pytest.mark.parametrize("row_id", BAD_IDS.values(), ids=BAD_IDS.keys())
+def test_messages_cursor_rejects_id(client, auth_headers, conversation_id, row_id):
+    assert _messages(client, auth_headers, conversation_id, TIMESTAMP, row_id).status_code == 400
+
+
+@pytest.mark.parametrize("timestamp", BAD_TIMESTAMPS.values(), ids=BAD_TIMESTAMPS.keys())
+def test_messages_cursor_rejects_timestamp(client, auth_headers, conversation_id, timestamp):
+    assert _messages(client, auth_headers, conversation_id, timestamp, 1).status_code == 400
+
+
+@pytest.mark.parametrize("timestamp", BAD_TIMESTAMPS.values(), ids=BAD_TIMESTAMPS.keys())
+def test_conversations_cursor_rejects_timestamp(client, auth_headers, timestamp):
+    assert _conversations(client, auth_headers, timestamp).status_code == 400
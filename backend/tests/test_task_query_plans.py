@@ -0,0 +1,70 @@
+"""
+Every task list query is answered from an index, already in order.
+
+Builds the GET /api/tasks query for each sort / order / status filter /
+cursor combination (and the GET /api/tasks/stats query) against a SQLite
+database migrated to head, and checks SQLite's EXPLAIN QUERY PLAN: the
+tasks table must be searched through an index and no temporary B-tree may
+be needed for the ORDER BY / GROUP BY.
+"""
+
+import itertools
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pytest
+from alembic import command
+from alembic.config import Config
+
+from src.database import engine
+from src.models import Task
+from src.routes.tasks import SORT_COLUMNS, _encode_cursor, _filter_tasks, _order_tasks, _stats_query
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def db():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    connection = sqlite3.connect(engine.url.database)
+    yield connection
+    connection.close()
+
+
+def _plan(db, query) -> List[str]:
+    sql = str(query.compile(engine.sync_engine, compile_kwargs={"literal_binds": True}))
+    return [row[3] for row in db.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def _cursor(sort_by: str, order: str, status_filter: Optional[str]) -> str:
+    task = Task(
+        id=42,
+        user_id="user-1",
+        title="Buy milk",
+        completed=status_filter == "completed",
+        created_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        updated_at=datetime(2026, 1, 2, tzinfo=timezone.utc),
+    )
+    return _encode_cursor(sort_by, order, task)
+
+
+@pytest.mark.parametrize(
+    "sort_by, order, status_filter, paged",
+    list(itertools.product(SORT_COLUMNS, ["asc", "desc"], [None, "active", "completed"], [False, True])),
+)
+def test_task_list_uses_an_index_in_order(db, sort_by, order, status_filter, paged):
+    cursor = _cursor(sort_by, order, status_filter) if paged else None
+    query, _ = _order_tasks(_filter_tasks("user-1", status_filter), status_filter, sort_by, order, cursor)
+    plan = _plan(db, query.limit(51))
+
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    assert any(step.startswith("SEARCH tasks USING") and "INDEX" in step for step in plan), plan
+
+
+def test_task_stats_count_from_the_index(db):
+    plan = _plan(db, _stats_query("user-1"))
+
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    assert any(step.startswith("SEARCH tasks USING COVERING INDEX") for step in plan), plan
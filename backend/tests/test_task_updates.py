@@ -0,0 +1,39 @@
+"""
+Task updates may omit title or completed, but not set them to null: the
+columns are NOT NULL, so a null must be rejected as invalid input (422)
+rather than reach the database.
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def task_id(client, auth_headers):
+    response = client.post("/api/tasks", json={"title": "Buy milk"}, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+@pytest.mark.parametrize("field", ["title", "completed"])
+def test_update_rejects_null(client, auth_headers, task_id, field):
+    response = client.patch(f"/api/tasks/{task_id}", json={field: None}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("field", ["title", "completed"])
+def test_bulk_update_rejects_null(client, auth_headers, task_id, field):
+    operations = [
+        {"op": "create", "title": "Walk the dog"},
+        {"op": "update", "id": task_id, field: None},
+    ]
+    response = client.post("/api/tasks/bulk", json={"operations": operations}, headers=auth_headers)
+    assert response.status_code == 422
+    # Nothing in the batch was applied
+    titles = [task["title"] for task in client.get("/api/tasks", headers=auth_headers).json()]
+    assert "Walk the dog" not in titles
+
+
+def test_update_allows_null_description(client, auth_headers, task_id):
+    response = client.patch(f"/api/tasks/{task_id}", json={"description": None}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Buy milk"
@@ -24,7 +24,7 @@ import {
     FormLabel,
     FormMessage,
 } from '@/components/ui/form';
-import api from '@/lib/api';
+import api, { setAuthTokens } from '@/lib/api';
 import toast from 'react-hot-toast';
 import { Mail, Lock, ArrowRight, Sparkles } from 'lucide-react';
 import { Header } from '@/components/Header';
@@ -65,8 +65,8 @@ export default function LoginPage() {
 
             const data = res.data;
 
-            // Set cookie for middleware access
-            document.cookie = `auth_token=${data.access_token}; path=/; max-age=${60 * 60 * 24 * 7}; sameSite=lax`;
+            // Set cookies for middleware access and token refresh
+            setAuthTokens(data);
 
             toast.success('Logged in successfully!');
             router.push('/dashboard');
@@ -1,9 +1,9 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useRouter } from "next/navigation";
 import Link from "next/link";
-import api from "@/lib/api";
+import api, { followTaskChanges } from "@/lib/api";
 import { Button } from "@/components/ui/button";
 import { Checkbox } from "@/components/ui/checkbox";
 import {
@@ -63,6 +63,12 @@ interface Task {
   created_at: string;
 }
 
+interface TaskStats {
+  total: number;
+  completed: number;
+  pending: number;
+}
+
 export default function DashboardPage() {
   const [tasks, setTasks] = useState<Task[]>([]);
   const [loading, setLoading] = useState(true);
@@ -76,6 +82,10 @@ export default function DashboardPage() {
   const [sortBy, setSortBy] = useState("created_at");
   const [sortOrder, setSortOrder] = useState("desc");
   const [statusFilter, setStatusFilter] = useState("all");
+  // Cursor of the next page of tasks, from the X-Next-Cursor header
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  // Counts over all tasks; `tasks` only holds the pages loaded so far
+  const [stats, setStats] = useState<TaskStats>({ total: 0, completed: 0, pending: 0 });
 
   // Editing state
   const [editingTask, setEditingTask] = useState<Task | null>(null);
@@ -100,16 +110,30 @@ export default function DashboardPage() {
     return () => clearTimeout(timer);
   }, [searchQuery, sortBy, sortOrder, statusFilter]);
 
-  const fetchTasks = async () => {
+  const taskParams = () => {
+    const params = new URLSearchParams();
+    if (searchQuery) params.append("search", searchQuery);
+    if (statusFilter !== "all") params.append("status", statusFilter);
+    params.append("sort_by", sortBy);
+    params.append("order", sortOrder);
+    return params;
+  };
+
+  const fetchStats = async () => {
     try {
-      const params = new URLSearchParams();
-      if (searchQuery) params.append("search", searchQuery);
-      if (statusFilter !== "all") params.append("status", statusFilter);
-      params.append("sort_by", sortBy);
-      params.append("order", sortOrder);
+      const response = await api.get("/tasks/stats");
+      setStats(response.data);
+    } catch (error) {
+      console.error("Failed to fetch task stats", error);
+    }
+  };
 
-      const response = await api.get(`/tasks?${params.toString()}`);
+  const fetchTasks = async () => {
+    fetchStats();
+    try {
+      const response = await api.get(`/tasks?${taskParams().toString()}`);
       setTasks(response.data);
+      setNextCursor(response.headers["x-next-cursor"] ?? null);
     } catch (error: any) {
       console.error("Failed to fetch tasks", error);
       if (error.response?.status === 401) {
@@ -120,12 +144,66 @@ export default function DashboardPage() {
     }
   };
 
+  const loadMoreTasks = async () => {
+    if (!nextCursor) return;
+    try {
+      const params = taskParams();
+      params.append("cursor", nextCursor);
+      const response = await api.get(`/tasks?${params.toString()}`);
+      // Skip tasks the change feed has already added
+      setTasks((current) => [
+        ...current,
+        ...response.data.filter((task: Task) => !current.some((t) => t.id === task.id)),
+      ]);
+      setNextCursor(response.headers["x-next-cursor"] ?? null);
+    } catch (error) {
+      console.error("Failed to fetch tasks", error);
+      toast.error("Failed to load more tasks");
+    }
+  };
+
+  // Apply changes made elsewhere (another tab, the chat agent) as they
+  // happen instead of refetching the list
+  const latest = useRef({ fetchTasks, fetchStats, searchQuery, statusFilter, sortBy, sortOrder });
+  latest.current = { fetchTasks, fetchStats, searchQuery, statusFilter, sortBy, sortOrder };
+
+  useEffect(() => {
+    const controller = new AbortController();
+    followTaskChanges((event) => {
+      const { fetchTasks, fetchStats, searchQuery, statusFilter, sortBy, sortOrder } = latest.current;
+      if (event.type === "ready" || event.type === "resync") {
+        // Changes may have been missed while disconnected
+        fetchTasks();
+        return;
+      }
+      fetchStats();
+      if (event.type === "task_deleted") {
+        setTasks((current) => current.filter((t) => t.id !== event.id));
+      } else if (searchQuery) {
+        // Only the server knows whether the task matches the search
+        fetchTasks();
+      } else if (event.task) {
+        const task = event.task as Task;
+        const matches = statusFilter === "all" || (statusFilter === "completed") === task.completed;
+        setTasks((current) => {
+          if (!matches) return current.filter((t) => t.id !== task.id);
+          if (current.some((t) => t.id === task.id)) {
+            return current.map((t) => (t.id === task.id ? task : t));
+          }
+          return sortBy === "created_at" && sortOrder === "desc" ? [task, ...current] : [...current, task];
+        });
+      }
+    }, controller.signal);
+    return () => controller.abort();
+  }, []);
+
   const toggleTask = async (id: number, currentCompleted: boolean) => {
     try {
       // Optimistic update
       setTasks(tasks.map(t => t.id === id ? { ...t, completed: !currentCompleted } : t));
 
       await api.patch(`/tasks/${id}`, { completed: !currentCompleted });
+      fetchStats();
       toast.success("Task updated!");
     } catch (error) {
       console.error("Failed to update task", error);
@@ -145,9 +223,11 @@ export default function DashboardPage() {
     setAddingTask(true);
     try {
       const res = await api.post("/tasks", { title: newTaskTitle, description: newTaskDescription });
-      setTasks([...tasks, res.data]);
+      // The change feed may have delivered it already
+      setTasks((current) => (current.some((t) => t.id === res.data.id) ? current : [...current, res.data]));
       setNewTaskTitle("");
       setNewTaskDescription("");
+      fetchStats();
       toast.success("Task created!");
     } catch (error) {
       console.error("Failed to add task", error);
@@ -161,6 +241,7 @@ export default function DashboardPage() {
     try {
       setTasks(tasks.filter(t => t.id !== id));
       await api.delete(`/tasks/${id}`);
+      fetchStats();
       toast.success("Task deleted");
     } catch (error) {
       console.error("Failed to delete task", error);
@@ -205,8 +286,6 @@ export default function DashboardPage() {
   }
 
 
-  const completedTasksValues = tasks.filter((t) => t.completed).length; // This might be inaccurate if filtered by search, but okay for stats
-  const pendingTasksValues = tasks.filter((t) => !t.completed).length;
 
   // We'll use the tasks returned by the backend directly now
   const displayTasks = tasks;
@@ -251,7 +330,7 @@ export default function DashboardPage() {
               <ListTodo className="h-4 w-4 text-muted-foreground" />
             </CardHeader>
             <CardContent>
-              <div className="text-3xl font-bold">{tasks.length}</div>
+              <div className="text-3xl font-bold">{stats.total}</div>
             </CardContent>
           </Card>
           <Card className="border-border bg-card/50 backdrop-blur-sm">
@@ -262,7 +341,7 @@ export default function DashboardPage() {
               <CheckCircle2 className="h-4 w-4 text-accent" />
             </CardHeader>
             <CardContent>
-              <div className="text-3xl font-bold text-accent">{completedTasksValues}</div>
+              <div className="text-3xl font-bold text-accent">{stats.completed}</div>
             </CardContent>
           </Card>
           <Card className="border-border bg-card/50 backdrop-blur-sm">
@@ -273,7 +352,7 @@ export default function DashboardPage() {
               <Clock className="h-4 w-4 text-yellow-500" />
             </CardHeader>
             <CardContent>
-              <div className="text-3xl font-bold text-yellow-500">{pendingTasksValues}</div>
+              <div className="text-3xl font-bold text-yellow-500">{stats.pending}</div>
             </CardContent>
           </Card>
           <Card className="border-border bg-card/50 backdrop-blur-sm">
@@ -285,7 +364,7 @@ export default function DashboardPage() {
             </CardHeader>
             <CardContent>
               <div className="text-3xl font-bold">
-                {tasks.length > 0 ? Math.round((completedTasksValues / tasks.length) * 100) : 0}%
+                {stats.total > 0 ? Math.round((stats.completed / stats.total) * 100) : 0}%
               </div>
             </CardContent>
           </Card>
@@ -458,6 +537,11 @@ export default function DashboardPage() {
                       ))}
                     </ul>
                   )}
+                  {nextCursor && (
+                    <Button variant="ghost" size="sm" onClick={loadMoreTasks} className="mt-3 w-full text-xs text-muted-foreground">
+                      Load more
+                    </Button>
+                  )}
                 </CardContent>
               </Card>
             </TabsContent>
@@ -13,6 +13,7 @@ import {
     User
 } from "lucide-react";
 import { cn } from "@/lib/utils";
+import api, { clearAuthTokens, getCookie } from "@/lib/api";
 import { Button } from "@/components/ui/button";
 import toast from "react-hot-toast";
 
@@ -38,8 +39,14 @@ export function DashboardSidebar({ className }: SidebarProps) {
         },
     ];
 
-    const handleLogout = () => {
-        document.cookie = "auth_token=; path=/; max-age=0";
+    const handleLogout = async () => {
+        // Revoke the tokens server-side; logging out locally doesn't depend on it
+        try {
+            await api.post("/auth/logout", { refresh_token: getCookie("refresh_token") ?? null });
+        } catch {
+            // Token already expired or revoked
+        }
+        clearAuthTokens();
         toast.success("Logged out successfully");
         router.push("/login");
     };
@@ -30,6 +30,9 @@ export default function ChatInterface({ token }: { token?: string }) {
     const [input, setInput] = useState('');
     const [conversationId, setConversationId] = useState<string | undefined>();
     const [conversations, setConversations] = useState<Conversation[]>([]);
+    // Cursors for the next (older) page, null when everything is loaded
+    const [conversationsCursor, setConversationsCursor] = useState<string | null>(null);
+    const [messagesCursor, setMessagesCursor] = useState<string | null>(null);
     const [isHistoryOpen, setIsHistoryOpen] = useState(true);
     const [isLoading, setIsLoading] = useState(false);
     const [isInitialLoading, setIsInitialLoading] = useState(true);
@@ -38,6 +41,8 @@ export default function ChatInterface({ token }: { token?: string }) {
     const [isDeleteAlertOpen, setIsDeleteAlertOpen] = useState(false);
     const [conversationToDelete, setConversationToDelete] = useState<string | null>(null);
     const messagesEndRef = useRef<HTMLDivElement>(null);
+    // Set while prepending earlier messages, which shouldn't scroll to the bottom
+    const keepScrollRef = useRef(false);
 
     const QUOTA_LIMIT = 7;
 
@@ -46,6 +51,10 @@ export default function ChatInterface({ token }: { token?: string }) {
     };
 
     useEffect(() => {
+        if (keepScrollRef.current) {
+            keepScrollRef.current = false;
+            return;
+        }
         scrollToBottom();
     }, [messages, isLoading]);
 
@@ -55,8 +64,9 @@ export default function ChatInterface({ token }: { token?: string }) {
 
     const fetchConversations = async () => {
         try {
-            const data = await getConversations(token);
-            setConversations(data);
+            const page = await getConversations(token);
+            setConversations(page.items);
+            setConversationsCursor(page.nextCursor);
         } catch (error) {
             console.error('Failed to fetch conversations:', error);
             toast.error('Failed to load history');
@@ -65,16 +75,31 @@ export default function ChatInterface({ token }: { token?: string }) {
         }
     };
 
+    const loadMoreConversations = async () => {
+        if (!conversationsCursor) return;
+        try {
+            const page = await getConversations(token, conversationsCursor);
+            setConversations(prev => [...prev, ...page.items]);
+            setConversationsCursor(page.nextCursor);
+        } catch (error) {
+            console.error('Failed to fetch conversations:', error);
+            toast.error('Failed to load history');
+        }
+    };
+
     const loadConversation = async (id: string) => {
         if (id === conversationId || isLoading) return;
 
         setIsLoading(true);
         setConversationId(id);
         setMessages([]);
+        setMessagesCursor(null);
 
         try {
-            const history = await getConversationMessages(id, token);
+            const page = await getConversationMessages(id, token);
+            const history = page.items;
             setMessages(history.map(m => ({ role: m.role, content: m.content })));
+            setMessagesCursor(page.nextCursor);
             // Optionally count existing user messages if you want the quota to be persistent
             const userMsgCount = history.filter(m => m.role === 'user').length;
             setMessageCount(userMsgCount);
@@ -86,9 +111,23 @@ export default function ChatInterface({ token }: { token?: string }) {
         }
     };
 
+    const loadEarlierMessages = async () => {
+        if (!conversationId || !messagesCursor) return;
+        try {
+            const page = await getConversationMessages(conversationId, token, messagesCursor);
+            keepScrollRef.current = true;
+            setMessages(prev => [...page.items.map(m => ({ role: m.role, content: m.content })), ...prev]);
+            setMessagesCursor(page.nextCursor);
+        } catch (error) {
+            console.error('Failed to load messages:', error);
+            toast.error('Failed to load earlier messages');
+        }
+    };
+
     const startNewChat = () => {
         setConversationId(undefined);
         setMessages([]);
+        setMessagesCursor(null);
         setInput('');
         setMessageCount(0);
     };
@@ -222,6 +261,14 @@ export default function ChatInterface({ token }: { token?: string }) {
                         </div>
                     )}
 
+                    {messagesCursor && (
+                        <div className="flex justify-center">
+                            <Button variant="ghost" size="sm" onClick={loadEarlierMessages} className="text-xs text-muted-foreground">
+                                Load earlier messages
+                            </Button>
+                        </div>
+                    )}
+
                     {messages.map((message, index) => (
                         <div
                             key={index}
@@ -339,39 +386,46 @@ export default function ChatInterface({ token }: { token?: string }) {
                                 <p className="text-xs font-medium leading-relaxed">No conversations yet.<br />Start a new one to see it here.</p>
                             </div>
                         ) : (
-                            conversations.map((conv) => (
-                                <div
-                                    key={conv.id}
-                                    onClick={() => loadConversation(conv.id)}
-                                    className={cn(
-                                        "group relative flex items-center gap-3 rounded-xl p-3 text-sm transition-all cursor-pointer border border-transparent",
-                                        conv.id === conversationId
-                                            ? "bg-accent/10 border-accent/20 text-foreground"
-                                            : "hover:bg-accent/5 text-muted-foreground hover:text-foreground"
-                                    )}
-                                >
-                                    <div className={cn(
-                                        "h-2 w-2 rounded-full ring-4 ring-background/0 transition-all",
-                                        conv.id === conversationId ? "bg-accent ring-accent/20" : "bg-muted-foreground/30"
-                                    )} />
-                                    <div className="flex-1 min-w-0">
-                                        <p className="font-semibold truncate leading-none mb-1">
-                                            {conv.title || "New Chat"}
-                                        </p>
-                                        <p className="text-[10px] text-muted-foreground/70 font-medium">
-                                            {format(new Date(conv.updated_at), 'MMM d, h:mm a')}
-                                        </p>
-                                    </div>
-                                    <Button
-                                        variant="ghost"
-                                        size="icon"
-                                        onClick={(e) => confirmDelete(e, conv.id)}
-                                        className="h-8 w-8 opacity-0 group-hover:opacity-100 transition-opacity hover:bg-destructive/10 hover:text-destructive rounded-lg"
+                            <>
+                                {conversations.map((conv) => (
+                                    <div
+                                        key={conv.id}
+                                        onClick={() => loadConversation(conv.id)}
+                                        className={cn(
+                                            "group relative flex items-center gap-3 rounded-xl p-3 text-sm transition-all cursor-pointer border border-transparent",
+                                            conv.id === conversationId
+                                                ? "bg-accent/10 border-accent/20 text-foreground"
+                                                : "hover:bg-accent/5 text-muted-foreground hover:text-foreground"
+                                        )}
                                     >
-                                        <Trash2 className="h-3.5 w-3.5" />
+                                        <div className={cn(
+                                            "h-2 w-2 rounded-full ring-4 ring-background/0 transition-all",
+                                            conv.id === conversationId ? "bg-accent ring-accent/20" : "bg-muted-foreground/30"
+                                        )} />
+                                        <div className="flex-1 min-w-0">
+                                            <p className="font-semibold truncate leading-none mb-1">
+                                                {conv.title || "New Chat"}
+                                            </p>
+                                            <p className="text-[10px] text-muted-foreground/70 font-medium">
+                                                {format(new Date(conv.updated_at), 'MMM d, h:mm a')}
+                                            </p>
+                                        </div>
+                                        <Button
+                                            variant="ghost"
+                                            size="icon"
+                                            onClick={(e) => confirmDelete(e, conv.id)}
+                                            className="h-8 w-8 opacity-0 group-hover:opacity-100 transition-opacity hover:bg-destructive/10 hover:text-destructive rounded-lg"
+                                        >
+                                            <Trash2 className="h-3.5 w-3.5" />
+                                        </Button>
+                                    </div>
+                                ))}
+                                {conversationsCursor && (
+                                    <Button variant="ghost" size="sm" onClick={loadMoreConversations} className="w-full text-xs text-muted-foreground">
+                                        Load more
                                     </Button>
-                                </div>
-                            ))
+                                )}
+                            </>
                         )}
                     </div>
 
@@ -1,5 +1,107 @@
 import axios from 'axios';
 
+// Both cookies outlive the access token itself; an expired access token is
+// renewed with the refresh token on the first 401
+const AUTH_COOKIE_MAX_AGE = 60 * 60 * 24 * 7;
+
+// Helper to get cookie by name
+export const getCookie = (name: string) => {
+  const value = `; ${document.cookie}`;
+  const parts = value.split(`; ${name}=`);
+  if (parts.length === 2) return parts.pop()?.split(';').shift();
+};
+
+export interface AuthTokens {
+  access_token: string;
+  refresh_token?: string | null;
+}
+
+export function setAuthTokens(tokens: AuthTokens) {
+  document.cookie = `auth_token=${tokens.access_token}; path=/; max-age=${AUTH_COOKIE_MAX_AGE}; sameSite=lax`;
+  if (tokens.refresh_token) {
+    document.cookie = `refresh_token=${tokens.refresh_token}; path=/; max-age=${AUTH_COOKIE_MAX_AGE}; sameSite=lax`;
+  }
+}
+
+export function clearAuthTokens() {
+  document.cookie = "auth_token=; path=/; max-age=0";
+  document.cookie = "refresh_token=; path=/; max-age=0";
+}
+
+let refreshing: Promise<string | null> | null = null;
+
+/**
+ * Trade the refresh token for a new token pair. Concurrent callers share
+ * one request, since each refresh token can only be used once.
+ */
+export function refreshAccessToken(): Promise<string | null> {
+  if (!refreshing) {
+    refreshing = (async () => {
+      const refreshToken = getCookie('refresh_token');
+      if (!refreshToken) return null;
+      try {
+        const res = await axios.post('/api/auth/refresh', { refresh_token: refreshToken });
+        setAuthTokens(res.data);
+        return res.data.access_token as string;
+      } catch {
+        clearAuthTokens();
+        return null;
+      }
+    })().finally(() => {
+      refreshing = null;
+    });
+  }
+  return refreshing;
+}
+
+export interface TaskEvent {
+  type: 'ready' | 'resync' | 'task_created' | 'task_updated' | 'task_deleted';
+  task?: any;
+  id?: number;
+}
+
+/**
+ * Follow the current user's task changes (GET /api/tasks/stream) until
+ * `signal` aborts, reconnecting after errors. Each connection starts with a
+ * `ready` event; on `ready` and `resync` the caller should refetch, since
+ * changes may have been missed while disconnected.
+ */
+export async function followTaskChanges(onEvent: (event: TaskEvent) => void, signal: AbortSignal): Promise<void> {
+  while (!signal.aborted) {
+    try {
+      const response = await fetch('/api/tasks/stream', {
+        headers: { Authorization: `Bearer ${getCookie('auth_token')}` },
+        signal,
+      });
+      if (response.status === 401) {
+        if (await refreshAccessToken()) continue;
+        return;
+      }
+      if (!response.ok || !response.body) {
+        throw new Error(`Task stream failed: ${response.status}`);
+      }
+
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        const frames = buffer.split('\n\n');
+        buffer = frames.pop() ?? '';
+        for (const frame of frames) {
+          // Keep-alive comments start with ':'
+          if (frame.startsWith('data: ')) onEvent(JSON.parse(frame.slice(6)));
+        }
+      }
+    } catch (error) {
+      if (signal.aborted) return;
+      console.error('Task stream interrupted', error);
+    }
+    await new Promise((resolve) => setTimeout(resolve, 3000));
+  }
+}
+
 const api = axios.create({
   baseURL: "/api",
   headers: {
@@ -10,13 +112,6 @@ const api = axios.create({
 
 api.interceptors.request.use(
   (config) => {
-    // Helper to get cookie by name
-    const getCookie = (name: string) => {
-      const value = `; ${document.cookie}`;
-      const parts = value.split(`; ${name}=`);
-      if (parts.length === 2) return parts.pop()?.split(';').shift();
-    };
-
     const token = getCookie('auth_token');
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
@@ -28,4 +123,21 @@ api.interceptors.request.use(
   }
 );
 
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const config = error.config;
+    const isAuthCall = config?.url?.startsWith('/auth/login') || config?.url?.startsWith('/auth/refresh');
+    if (error.response?.status === 401 && config && !config._retried && !isAuthCall) {
+      config._retried = true;
+      const token = await refreshAccessToken();
+      if (token) {
+        config.headers.Authorization = `Bearer ${token}`;
+        return api(config);
+      }
+    }
+    return Promise.reject(error);
+  }
+);
+
 export default api;
@@ -2,6 +2,8 @@
  * API client for chat endpoints
  */
 
+import { getCookie, refreshAccessToken } from './api';
+
 interface ChatMessage {
     role: 'user' | 'assistant';
     content: string;
@@ -24,6 +26,40 @@ export interface Conversation {
     updated_at: string;
 }
 
+/**
+ * One page of a listing; pass nextCursor as `before` to get the next one
+ */
+export interface Page<T> {
+    items: T[];
+    nextCursor: string | null;
+}
+
+function withBefore(url: string, before?: string): string {
+    return before ? `${url}?before=${encodeURIComponent(before)}` : url;
+}
+
+/**
+ * fetch with the bearer token, renewing an expired access token once
+ */
+async function authFetch(url: string, init: RequestInit, token?: string): Promise<Response> {
+    const withToken = (t?: string): RequestInit => ({
+        ...init,
+        headers: {
+            ...init.headers,
+            ...(t && { Authorization: `Bearer ${t}` }),
+        },
+    });
+
+    // The cookie holds the latest token if it was refreshed since the page loaded
+    const response = await fetch(url, withToken(getCookie('auth_token') ?? token));
+    if (response.status !== 401) {
+        return response;
+    }
+
+    const refreshed = await refreshAccessToken();
+    return refreshed ? fetch(url, withToken(refreshed)) : response;
+}
+
 /**
  * Send a chat message to the backend
  */
@@ -32,17 +68,16 @@ export async function sendChatMessage(
     conversationId?: string,
     token?: string
 ): Promise<ChatResponse> {
-    const response = await fetch('/api/chat', {
+    const response = await authFetch('/api/chat', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
-            ...(token && { Authorization: `Bearer ${token}` }),
         },
         body: JSON.stringify({
             message,
             conversation_id: conversationId,
         }),
-    });
+    }, token);
 
     if (!response.ok) {
         const error = await response.json();
@@ -53,40 +88,36 @@ export async function sendChatMessage(
 }
 
 /**
- * Get all conversations for the current user
+ * Get the current user's conversations, most recently active first
  */
-export async function getConversations(token?: string): Promise<Conversation[]> {
-    const response = await fetch('/api/chat/conversations', {
-        headers: {
-            ...(token && { Authorization: `Bearer ${token}` }),
-        },
-    });
+export async function getConversations(token?: string, before?: string): Promise<Page<Conversation>> {
+    const response = await authFetch(withBefore('/api/chat/conversations', before), {}, token);
 
     if (!response.ok) {
         throw new Error('Failed to load conversations');
     }
 
-    return response.json();
+    return { items: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
 }
 
 /**
- * Get messages for a specific conversation
+ * Get the latest messages of a conversation (or those before `before`),
+ * in chronological order
  */
 export async function getConversationMessages(
     conversationId: string,
-    token?: string
-): Promise<ChatMessage[]> {
-    const response = await fetch(`/api/chat/conversations/${conversationId}/messages`, {
-        headers: {
-            ...(token && { Authorization: `Bearer ${token}` }),
-        },
-    });
+    token?: string,
+    before?: string
+): Promise<Page<ChatMessage>> {
+    const response = await authFetch(
+        withBefore(`/api/chat/conversations/${conversationId}/messages`, before), {}, token
+    );
 
     if (!response.ok) {
         throw new Error('Failed to load messages');
     }
 
-    return response.json();
+    return { items: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
 }
 
 /**
@@ -96,12 +127,9 @@ export async function deleteConversation(
     conversationId: string,
     token?: string
 ): Promise<void> {
-    const response = await fetch(`/api/chat/conversations/${conversationId}`, {
+    const response = await authFetch(`/api/chat/conversations/${conversationId}`, {
         method: 'DELETE',
-        headers: {
-            ...(token && { Authorization: `Bearer ${token}` }),
-        },
-    });
+    }, token);
 
     if (!response.ok) {
         throw new Error('Failed to delete conversation');